@@ -0,0 +1,164 @@
+# admission.py
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+# Admission control for /analyze_cv. At most max_concurrent analyses run at once and at most
+# queue_limit more wait for a slot, first come first served. A request is shed immediately
+# (503 with Retry-After) when the queue is full or when its estimated queue wait plus service
+# time would overrun the deadline, rather than starting work that will time out anyway. The
+# service time estimate is an exponentially weighted moving average of analyses that ran to
+# completion; failed or cancelled ones are left out so cheap error paths cannot drag it down.
+
+# Service time assumed before the first analysis completes.
+INITIAL_SERVICE_TIME = 10.0
+# Weight of the newest sample in the service time average.
+SERVICE_TIME_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request is shed; retry_after is the suggested client back-off in seconds.
+    """
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Request shed ({reason}); retry after {retry_after}s.")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounded concurrency with a short FIFO wait queue and deadline-aware load shedding.
+    One instance is shared by all requests of a worker process.
+    """
+
+    def __init__(self, max_concurrent: int, queue_limit: int, deadline: float,
+                 initial_service_time: float = INITIAL_SERVICE_TIME):
+        self.max_concurrent = max_concurrent
+        self.queue_limit = queue_limit
+        self.deadline = deadline
+        self.service_time = initial_service_time
+        self._active = 0
+        self._waiters = deque()
+        self.peak_queued = 0
+        self.admitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.shed = {"queue_full": 0, "deadline": 0, "queue_timeout": 0}
+        self.queue_wait_total = 0.0
+
+    def estimated_wait(self) -> float:
+        """
+        Estimate the queue wait of a request arriving now: the requests ahead of it, plus itself,
+        each need one slot to free up, and slots free at max_concurrent per service time.
+        """
+        if self._active < self.max_concurrent and not self._waiters:
+            return 0.0
+        return (len(self._waiters) + 1) * self.service_time / self.max_concurrent
+
+    def _reject(self, reason: str, wait: float):
+        self.shed[reason] += 1
+        raise AdmissionRejected(reason, max(1, math.ceil(wait)))
+
+    async def acquire(self, budget: float = None) -> float:
+        """
+        Wait for an analysis slot and return the time spent queued, or raise AdmissionRejected.
+        budget is the time the request has left (the deadline less anything it has already
+        spent, e.g. on extraction); it defaults to the full deadline.
+        """
+        budget = self.deadline if budget is None else budget
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self.admitted += 1
+            return 0.0
+
+        wait = self.estimated_wait()
+        if len(self._waiters) >= self.queue_limit:
+            self._reject("queue_full", wait)
+        if wait + self.service_time > budget:
+            self._reject("deadline", wait)
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        self.peak_queued = max(self.peak_queued, len(self._waiters))
+        start = time.monotonic()
+        try:
+            # Give up once the remaining time could no longer fit one analysis.
+            await asyncio.wait_for(waiter, timeout=max(0.0, budget - self.service_time))
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on.
+                self._release_slot()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject("queue_timeout", self.estimated_wait())
+            raise
+        waited = time.monotonic() - start
+        self.admitted += 1
+        self.queue_wait_total += waited
+        return waited
+
+    def _release_slot(self):
+        # Hand the slot straight to the next live waiter, so it cannot be taken by a newcomer.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    def release(self, service_time: float = None):
+        """
+        Free a slot. The service time of an analysis that completed is folded into the running
+        estimate; pass None for one that failed or was cancelled.
+        """
+        if service_time is None:
+            self.failed += 1
+        else:
+            self.completed += 1
+            self.service_time += SERVICE_TIME_ALPHA * (service_time - self.service_time)
+        self._release_slot()
+
+    @asynccontextmanager
+    async def slot(self, budget: float = None):
+        """
+        Hold an analysis slot for the duration of the block; yields the time spent queued.
+        budget is passed to acquire(). Only a block that exits normally contributes to the
+        service time estimate.
+        """
+        waited = await self.acquire(budget)
+        start = time.monotonic()
+        try:
+            yield waited
+        except BaseException:
+            self.release(None)
+            raise
+        self.release(time.monotonic() - start)
+
+    def metrics(self) -> dict:
+        """
+        Return current occupancy, shed counts by reason and the service time estimate.
+        """
+        return {
+            "max_concurrent": self.max_concurrent,
+            "queue_limit": self.queue_limit,
+            "deadline": self.deadline,
+            "active": self._active,
+            "queued": len(self._waiters),
+            "peak_queued": self.peak_queued,
+            "admitted": self.admitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "shed": dict(self.shed),
+            "shed_total": sum(self.shed.values()),
+            "service_time_estimate": self.service_time,
+            "mean_queue_wait": self.queue_wait_total / (self.admitted or 1)
+        }
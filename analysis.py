@@ -5,12 +5,37 @@ from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate
 from langchain.schema import HumanMessage
 from pydantic import BaseModel
+from typing import Optional
 from langchain.output_parsers import PydanticOutputParser
 
 from config import settings
+from stream_parser import IncrementalJSONParser
+from executors import get_pool, PoolSaturatedError
+from history_store import cv_digest, criteria_fingerprint
+from revision import split_sections, plan_reanalysis
+from prescreen import Prescreener, build_prescreener, synthetic_low_result, SUPER_CRITERIA_KEY
 
 logger = logging.getLogger(__name__)
 
+# A criterion counts towards eligibility when its rating is at or above this value.
+POSITIVE_RATING_THRESHOLD = 6
+# A super-criteria rating at or above this value makes the overall eligibility "high".
+SUPER_CRITERIA_THRESHOLD = 9
+
+# Major internationally recognized awards used for the super-criteria prompt and pre-screen.
+SUPER_AWARDS = [
+    "Nobel Prize",
+    "Fields Medal",
+    "Turing Award",
+    "Abel Prize",
+    "Breakthrough Prize",
+    "Lasker Award",
+    "Kavli Prize",
+    "Shaw Prize",
+    "Wolf Prize",
+    "Kyoto Prize",
+]
+
 # Initialize the LLM using LangChain with our configuration.
 llm = ChatOpenAI(
     openai_api_key=settings.openai_api_key,
@@ -19,20 +44,52 @@ llm = ChatOpenAI(
     max_tokens=600
 )
 
+# Clients for models other than settings.llm_model (e.g. the cascade's fast tier), created on first use.
+_llm_clients = {settings.llm_model: llm}
+
+def get_llm(model: str):
+    """
+    Return the LangChain chat client for the given model, creating it on first use.
+    """
+    if model not in _llm_clients:
+        _llm_clients[model] = ChatOpenAI(
+            openai_api_key=settings.openai_api_key,
+            model=model,
+            temperature=0.0,
+            max_tokens=600
+        )
+    return _llm_clients[model]
+
 class CriterionResult(BaseModel):
     rating: int
     chain_of_thought: str
     evidence_list: list
+    confidence: Optional[int] = None
 
 # Create a parser using your Pydantic model.
 output_parser = PydanticOutputParser(pydantic_object=CriterionResult)
 
-def build_criterion_prompt(criterion_text: str, cv_text: str, general_instructions: str, comparable_evidence: str) -> str:
+# Fields a non-verbose request needs. The prompts ask for these before chain_of_thought so a
+# streamed completion can be stopped as soon as they arrive.
+BRIEF_FIELDS = ("rating", "evidence_list")
+
+def build_criterion_prompt(criterion_text: str, cv_text: str, general_instructions: str, comparable_evidence: str, highlights: list = None) -> str:
     """
     Build a prompt using ChatPromptTemplate and HumanMessagePromptTemplate.
     The prompt instructs the LLM to return a JSON object with keys:
     'rating', 'chain_of_thought', and 'evidence_list'.
+    If highlights (pre-screen snippets) are given, they are added as a section pointing the LLM
+    at the parts of the resume most likely to be relevant.
     """
+    highlights_block = ""
+    if highlights:
+        highlights_block = (
+            "<start_highlights>\n"
+            "Resume excerpts matching terms associated with this criterion (matches wrapped in [[ ]]):\n"
+            + "\n".join(f"- {snippet}" for snippet in highlights)
+            + "\n<end_highlights>"
+        )
+
     prompt_template = ChatPromptTemplate.from_messages([
         HumanMessagePromptTemplate.from_template(
             """
@@ -42,7 +99,8 @@ def build_criterion_prompt(criterion_text: str, cv_text: str, general_instructio
             2. Provide detailed chain-of-thought reasoning.
             3. Assign a rating from 1 (no evidence) to 10 (overwhelming evidence).
             4. List specific supporting evidence from the resume that justify your rating.
-            Return your output as a valid JSON object with keys "rating", "chain_of_thought", and "evidence_list". Do not include any extra text.
+            5. Report your confidence in the rating from 1 (a guess) to 10 (certain).
+            Return your output as a valid JSON object with keys "rating", "evidence_list", "confidence", and "chain_of_thought", in that order. Do not include any extra text.
             <end_instructions>
             <start_criterion>
             {criterion_text}
@@ -56,6 +114,7 @@ def build_criterion_prompt(criterion_text: str, cv_text: str, general_instructio
             <start_comparable_evidence>
             {comparable_evidence}
             <end_comparable_evidence>
+            {highlights_block}
             """
         )
     ])
@@ -64,7 +123,8 @@ def build_criterion_prompt(criterion_text: str, cv_text: str, general_instructio
         criterion_text=criterion_text,
         cv_text=cv_text,
         general_instructions=general_instructions,
-        comparable_evidence=comparable_evidence
+        comparable_evidence=comparable_evidence,
+        highlights_block=highlights_block
     )
     return prompt
 
@@ -83,7 +143,8 @@ def build_super_criteria_prompt(cv_text: str, general_instructions: str, super_a
             2. Provide detailed chain-of-thought reasoning for your evaluation.
             3. Assign a rating from 1 to 10, where 1 indicates no evidence and 10 indicates overwhelming evidence.
             4. List specific supporting evidence from the resume that justify your rating.
-            Return your output as a valid JSON object with keys "rating", "chain_of_thought", and "evidence_list". Do not include any extra text.
+            5. Report your confidence in the rating from 1 (a guess) to 10 (certain).
+            Return your output as a valid JSON object with keys "rating", "evidence_list", "confidence", and "chain_of_thought", in that order. Do not include any extra text.
             <end_instructions>
             <start_super_examples>
             {super_award_examples}
@@ -104,17 +165,71 @@ def build_super_criteria_prompt(cv_text: str, general_instructions: str, super_a
     )
     return prompt
 
-async def query_llm(prompt: str) -> dict:
+async def query_llm(prompt: str, model: str = None, verbose: bool = True) -> dict:
     """
     Query the LLM using the given prompt and return the parsed JSON output.
     Uses LangChain's PydanticOutputParser to enforce JSON formatting.
+    The primary model (settings.llm_model) is used unless another model is given.
+
+    With settings.llm_streaming, the completion is streamed through an IncrementalJSONParser.
+    A non-verbose query stops reading as soon as the brief fields (and confidence) are complete,
+    uses a reduced token budget, and returns an empty chain_of_thought. If the streamed output
+    cannot be parsed incrementally, the full text is parsed as usual; a brief query whose output
+    was cut off by the reduced budget (finish reason "length") is retried with the full budget.
     """
+    client = get_llm(model) if model else llm
+    messages = [HumanMessage(content=prompt)]
+
     def _query():
         # Wrap the prompt in a HumanMessage and invoke the model.
-        response = llm.invoke([HumanMessage(content=prompt)])
+        response = client.invoke(messages)
         return response.content
-    
-    response_text = await asyncio.to_thread(_query)
+
+    def _query_stream():
+        # Returns the streamed text, the parsed fields when the brief result completed early,
+        # and whether the output was cut off by the token budget.
+        parser = IncrementalJSONParser()
+        chunks = []
+        finish_reason = None
+        if verbose:
+            stream = client.stream(messages)
+        else:
+            stream = client.stream(messages, max_tokens=settings.stream_brief_max_tokens)
+        try:
+            for chunk in stream:
+                chunks.append(chunk.content)
+                finish_reason = (getattr(chunk, "response_metadata", None) or {}).get("finish_reason", finish_reason)
+                parser.feed(chunk.content)
+                if parser.failed:
+                    continue
+                if not verbose and parser.has_fields(BRIEF_FIELDS) and (
+                    "confidence" in parser.fields or parser.current_key == "chain_of_thought" or parser.done
+                ):
+                    return "".join(chunks), parser.fields, False
+        finally:
+            # Closing the generator ends the HTTP stream early when we stop reading.
+            if hasattr(stream, "close"):
+                stream.close()
+        if finish_reason is not None:
+            truncated = finish_reason == "length"
+        else:
+            # No finish reason reported: the output was cut off if valid JSON stopped midway.
+            truncated = parser.started and not parser.done and not parser.failed
+        return "".join(chunks), None, truncated
+
+    if settings.llm_streaming:
+        response_text, brief_fields, truncated = await get_pool("llm").run(_query_stream)
+        if brief_fields is not None:
+            try:
+                brief_fields.setdefault("chain_of_thought", "")
+                return CriterionResult(**brief_fields).model_dump()
+            except Exception as e:
+                logger.info(f"Incremental parse failed, falling back to full parse: {e}")
+        if not verbose and truncated:
+            logger.info("Brief stream was cut off by its token budget; retrying with the full budget")
+            response_text = await get_pool("llm").run(_query)
+    else:
+        response_text = await get_pool("llm").run(_query)
     
     try:
         # Use the output parser to parse the response.
@@ -124,8 +239,52 @@ async def query_llm(prompt: str) -> dict:
     except Exception as e:
         return {"error": f"Could not parse response: {e}", "raw_response": response_text}
 
+def escalation_reason(result: dict, threshold: int) -> Optional[str]:
+    """
+    Decide whether a fast-tier result must be re-evaluated by the primary model.
 
-async def evaluate_criterion(cv_text: str, criterion: dict, general_instructions: list, comparable_evidence: str) -> dict:
+    Returns the reason for escalating, or None to accept the result:
+      - "parse_failure": the response had no integer rating.
+      - "borderline": the rating falls within settings.cascade_borderline_band of the threshold,
+        i.e. threshold - band <= rating < threshold + band.
+      - "low_confidence": the self-reported confidence is below settings.cascade_min_confidence.
+    """
+    rating = result.get("rating") if isinstance(result, dict) else None
+    if not isinstance(rating, int):
+        return "parse_failure"
+    band = settings.cascade_borderline_band
+    if threshold - band <= rating < threshold + band:
+        return "borderline"
+    confidence = result.get("confidence")
+    if isinstance(confidence, int) and confidence < settings.cascade_min_confidence:
+        return "low_confidence"
+    return None
+
+async def run_evaluation(prompt: str, threshold: int, verbose: bool = True) -> dict:
+    """
+    Evaluate a prompt, using the model cascade when settings.cascade_enabled is set.
+
+    In cascade mode the fast model (settings.cascade_model) answers first and its result is kept
+    unless escalation_reason() flags it, in which case the primary model answers instead.
+    Each cascade result records the tier that produced it ("fast" or "primary").
+    """
+    if not settings.cascade_enabled:
+        return await query_llm(prompt, verbose=verbose)
+
+    fast_result = await query_llm(prompt, model=settings.cascade_model, verbose=verbose)
+    reason = escalation_reason(fast_result, threshold)
+    if reason is None:
+        fast_result["tier"] = "fast"
+        return fast_result
+
+    logger.info(f"Escalating to {settings.llm_model}: {reason}")
+    primary_result = await query_llm(prompt, model=settings.llm_model, verbose=verbose)
+    primary_result["tier"] = "primary"
+    primary_result["escalation_reason"] = reason
+    return primary_result
+
+
+async def evaluate_criterion(cv_text: str, criterion: dict, general_instructions: list, comparable_evidence: str, highlights: list = None, verbose: bool = True) -> dict:
     """
     Build a prompt for a single criterion using a prompt template and call the LLM API.
     """
@@ -135,48 +294,39 @@ async def evaluate_criterion(cv_text: str, criterion: dict, general_instructions
         criterion_text=criterion["full_text"],
         cv_text=cv_text,
         general_instructions=general_instructions_str,
-        comparable_evidence=comparable_evidence
+        comparable_evidence=comparable_evidence,
+        highlights=highlights
     )
-    return await query_llm(prompt)
+    return await run_evaluation(prompt, POSITIVE_RATING_THRESHOLD, verbose=verbose)
 
-async def evaluate_super_criteria(cv_text: str, general_instructions: list) -> dict:
+async def evaluate_super_criteria(cv_text: str, general_instructions: list, verbose: bool = True) -> dict:
     """
     Build and send a prompt to evaluate the super-criteria.
     The super-criteria check is intended to determine whether the applicant's resume clearly meets an exceptionally high standard,
     by providing evidence of a major internationally recognized award.
     """
-    super_award_examples = (
-        "Examples of major internationally recognized awards include:\n"
-        "- Nobel Prize\n"
-        "- Fields Medal\n"
-        "- Turing Award\n"
-        "- Abel Prize\n"
-        "- Breakthrough Prize\n"
-        "- Lasker Award\n"
-        "- Kavli Prize\n"
-        "- Shaw Prize\n"
-        "- Wolf Prize\n"
-        "- Kyoto Prize"
+    super_award_examples = "Examples of major internationally recognized awards include:\n" + "\n".join(
+        f"- {award}" for award in SUPER_AWARDS
     )
     
     general_instructions_str = " ".join(general_instructions)
     prompt = build_super_criteria_prompt(cv_text, general_instructions_str, super_award_examples)
-    return await query_llm(prompt)
+    return await run_evaluation(prompt, SUPER_CRITERIA_THRESHOLD, verbose=verbose)
 
 def score_eligibility(criteria_responses: list) -> str:
     """
     Aggregate individual criterion responses to determine overall eligibility.
     A simple heuristic is applied:
-      - High: 6 or more criteria with rating >= 6.
-      - Medium: 3 to 5 criteria with rating >= 6.
-      - Low: Fewer than 3 criteria with rating >= 6.
+      - High: 6 or more criteria with rating >= POSITIVE_RATING_THRESHOLD (6).
+      - Medium: 3 to 5 criteria with rating >= POSITIVE_RATING_THRESHOLD.
+      - Low: Fewer than 3 criteria with rating >= POSITIVE_RATING_THRESHOLD.
     """
     logger.info("Scoring eligibility based on all criteria")
     positive_count = 0
     for response in criteria_responses:
         if isinstance(response, dict):
             rating = response.get("rating", 0)
-            if isinstance(rating, int) and rating >= 6:
+            if isinstance(rating, int) and rating >= POSITIVE_RATING_THRESHOLD:
                 positive_count += 1
     if positive_count >= 6:
         return "high"
@@ -185,19 +335,39 @@ def score_eligibility(criteria_responses: list) -> str:
     else:
         return "low"
 
-async def perform_analysis(cv_text: str, visa_info: dict) -> dict:
+def analysis_model_key() -> str:
+    """
+    Identify the model configuration that produced a result, for keying stored history.
+    """
+    if settings.cascade_enabled:
+        return f"cascade:{settings.cascade_model}+{settings.llm_model}"
+    return settings.llm_model
+
+async def perform_analysis(cv_text: str, visa_info: dict, verbose: bool = True, history=None,
+                           fingerprint: str = None) -> dict:
     """
     Analyze the CV text against the O-1A visa criteria concurrently.
     
     This version runs the super-criteria evaluation in parallel with the standard criteria.
     - If a super-criteria is provided, its task is run concurrently.
     - All criteria tasks are gathered together.
-    - If the super-criteria result (if present) has a rating >= 9, overall eligibility is "high".
+    - If the super-criteria result (if present) has a rating >= SUPER_CRITERIA_THRESHOLD (9), overall eligibility is "high".
     - Otherwise, the overall eligibility is determined by aggregating the standard criteria responses.
+    - With settings.cascade_enabled, each criterion is first evaluated by a cheaper model (see run_evaluation).
+    - With verbose=False, chain-of-thought may be omitted by the LLM calls (see query_llm streaming).
+    - With settings.prescreen_enabled, criteria whose keywords do not appear in the CV get a synthetic
+      rating of 1 without an LLM call, and the others get the matching excerpts highlighted in their prompt.
+    - fingerprint is the precomputed criteria_fingerprint(visa_info); it is computed here if omitted.
+    - If a HistoryStore is given as history, every criterion result (including a super-criteria result
+      below the threshold) is persisted for offline re-scoring.
+    - With history and settings.incremental_reanalysis, a CV that is a revision of a stored one only
+      re-evaluates the criteria affected by the changed lines (see revision.plan_reanalysis).
     
     Returns a dictionary with:
       - "criteria_results": A mapping of criterion names to their individual responses.
       - "eligibility_rating": Overall eligibility rating ("low", "medium", "high").
+      - "reanalysis" (only for a detected revision): "revision_of" (the earlier CV digest) and
+        "recomputed_criteria" (the criteria that were re-evaluated).
     """
     
     logger.info("Performing analysis of CV for visa criteria")
@@ -205,25 +375,80 @@ async def perform_analysis(cv_text: str, visa_info: dict) -> dict:
     comparable_evidence = visa_info.get("comparable_evidence", "")
     super_criteria = visa_info.get("super_criteria", None)
     
+    sections = None
+    reanalysis = None
+    cached_results = {}
+    digest = cv_digest(cv_text)
+    if history is not None:
+        fingerprint = fingerprint or criteria_fingerprint(visa_info)
+        sections = split_sections(cv_text)
+        if settings.incremental_reanalysis:
+            try:
+                reanalysis = await get_pool("history").run(
+                    plan_reanalysis, sections, visa_info, history, fingerprint, analysis_model_key(),
+                    settings.revision_min_overlap, SUPER_AWARDS, verbose
+                )
+            except Exception as e:
+                logger.error(f"Could not check analysis history for a revision: {e}")
+            if reanalysis is not None:
+                cached_results = reanalysis["cached_results"]
+
+    # Names of the criteria whose results come without chain-of-thought, so the history does not
+    # reuse them for a later verbose request.
+    brief_criteria = set(reanalysis["brief_criteria"]) if reanalysis is not None else set()
+    brief_run = not verbose and settings.llm_streaming
+
+    hits = None
+    if settings.prescreen_enabled:
+        hits = build_prescreener(visa_info, SUPER_AWARDS).scan(cv_text)
+
+    async def _ready(result: dict) -> dict:
+        return result
+
     tasks = []
 
     # If super-criteria is provided, schedule it as a task.
     super_task = None
     if super_criteria:
-        super_task = asyncio.create_task(evaluate_super_criteria(cv_text, general_instructions))
+        if SUPER_CRITERIA_KEY in cached_results:
+            super_task = asyncio.create_task(_ready(cached_results[SUPER_CRITERIA_KEY]))
+        elif hits is not None and not hits.get(SUPER_CRITERIA_KEY, True):
+            super_task = asyncio.create_task(_ready(synthetic_low_result()))
+        else:
+            super_task = asyncio.create_task(evaluate_super_criteria(cv_text, general_instructions, verbose))
+            if brief_run:
+                brief_criteria.add(SUPER_CRITERIA_KEY)
         tasks.append(super_task)
 
     # Schedule standard criteria evaluation tasks.
-    standard_tasks = [
-        asyncio.create_task(evaluate_criterion(cv_text, crit, general_instructions, comparable_evidence))
-        for crit in visa_info.get("criteria", [])
-    ]
+    standard_tasks = []
+    for crit in visa_info.get("criteria", []):
+        if crit["name"] in cached_results:
+            standard_tasks.append(asyncio.create_task(_ready(cached_results[crit["name"]])))
+            continue
+        spans = hits.get(crit["name"]) if hits is not None else None
+        if spans is not None and not spans:
+            logger.info(f"Pre-screen found no evidence for {crit['name']}; skipping LLM call")
+            standard_tasks.append(asyncio.create_task(_ready(synthetic_low_result())))
+            continue
+        highlights = Prescreener.snippets(cv_text, spans) if spans else None
+        standard_tasks.append(asyncio.create_task(
+            evaluate_criterion(cv_text, crit, general_instructions, comparable_evidence, highlights, verbose)
+        ))
+        if brief_run:
+            brief_criteria.add(crit["name"])
     tasks.extend(standard_tasks)
 
     logger.info("Gathering calls to LLM for analysis")
     # Run all tasks concurrently.
     responses = await asyncio.gather(*tasks, return_exceptions=True)
     logger.info("All calls to LLM completed.")
+
+    # A saturated LLM pool means the server is overloaded; fail the request rather than
+    # scoring it with missing criteria.
+    for response in responses:
+        if isinstance(response, PoolSaturatedError):
+            raise response
     
     results = {}
     # Separate out the super-criteria result if it was scheduled.
@@ -243,7 +468,7 @@ async def perform_analysis(cv_text: str, visa_info: dict) -> dict:
             results[criterion_name] = response
 
     # Check the super-criteria result, if it exists.
-    if super_result and "rating" in super_result and isinstance(super_result["rating"], int) and super_result["rating"] >= 9:
+    if super_result and "rating" in super_result and isinstance(super_result["rating"], int) and super_result["rating"] >= SUPER_CRITERIA_THRESHOLD:
         logger.info("Super criteria - Nobel Prize style accomplishment found")
         results["super_criteria"] = super_result
         overall_rating = "high"
@@ -251,8 +476,28 @@ async def perform_analysis(cv_text: str, visa_info: dict) -> dict:
         overall_rating = score_eligibility(standard_responses)
 
     logger.info(f"Overall rating: {overall_rating}")
-    return {
+
+    if history is not None:
+        stored_results = dict(results)
+        if isinstance(super_result, dict):
+            stored_results[SUPER_CRITERIA_KEY] = super_result
+        try:
+            await get_pool("history").run(
+                history.record, digest, fingerprint,
+                analysis_model_key(), stored_results, overall_rating, sections, brief_criteria
+            )
+        except Exception as e:
+            logger.error(f"Could not store analysis history: {e}")
+
+    analysis_result = {
         "criteria_results": results,
         "eligibility_rating": overall_rating
     }
+    # Re-uploading an identical CV reuses its stored results but is not reported as a revision.
+    if reanalysis is not None and reanalysis["revision_of"] != digest:
+        analysis_result["reanalysis"] = {
+            "revision_of": reanalysis["revision_of"],
+            "recomputed_criteria": reanalysis["recomputed_criteria"]
+        }
+    return analysis_result
     
@@ -0,0 +1,77 @@
+# benchmarks/bench_admission.py
+"""
+Compare /analyze_cv goodput with and without admission control under increasing overload.
+
+The app is driven in-process with the stub LLM at Poisson arrival rates (see load_test.py),
+once with admission control disabled and once enabled. Goodput is the rate of successful
+(200) responses. Without admission control every request is started, so past capacity the
+analyses share the LLM pool, all slow down together and start timing out. With it, excess
+requests are shed early with 503 and Retry-After, and the admitted ones still finish in time.
+
+Usage:
+    python -m benchmarks.bench_admission --rates 1,2,4,8,16 --duration 20 --deadline 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.load_test import load_corpus, run_rate, format_row
+from benchmarks.stub_llm import install_stub_llm
+
+
+async def run_benchmark(args) -> dict:
+    from admission import AdmissionController
+    from config import settings
+    from shared_cache import close_cache
+    import main
+
+    install_stub_llm(latency=args.llm_latency, jitter=args.llm_jitter, seed=args.seed)
+    # Keep stub results out of the analysis history, and replayed CVs out of the shared cache.
+    main.history_store = None
+    settings.shared_cache_path = None
+    close_cache()
+    settings.analysis_timeout = args.deadline
+
+    corpus = load_corpus(args.corpus)
+    results = {}
+    for label, max_concurrent in (("without admission control", 0), ("with admission control", args.max_concurrent)):
+        print(f"\n{label} (deadline {args.deadline:.0f}s"
+              + (f", max_concurrent {max_concurrent}, queue_limit {args.queue_limit})" if max_concurrent else ")"))
+        print(f"{'rate':>7}{'sent':>7}{'ok':>7}{'req/s':>9}{'p50':>8}{'p95':>8}{'p99':>8}{'errors':>8}  statuses")
+        rows = []
+        for rate in args.rates:
+            # A fresh controller per rate, so metrics and the service time estimate start clean.
+            main.admission = AdmissionController(max_concurrent, args.queue_limit, args.deadline) if max_concurrent else None
+            rng = random.Random(args.seed)
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+                row = await run_rate(client, corpus, rate, args.duration, args.deadline + 30, rng)
+            rows.append(row)
+            print(format_row(row), flush=True)
+        results[label] = rows
+    return results
+
+
+def parse_args(argv: list = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="*", help="Resume files or directories to replay.")
+    parser.add_argument("--rates", type=lambda v: [float(r) for r in v.split(",")], default=[1.0, 2.0, 4.0, 8.0, 16.0],
+                        help="Comma-separated arrival rates in requests per second.")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of arrivals per rate.")
+    parser.add_argument("--deadline", type=float, default=20.0, help="analysis_timeout for the run, in seconds.")
+    parser.add_argument("--max-concurrent", type=int, default=4)
+    parser.add_argument("--queue-limit", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Stub LLM latency per call.")
+    parser.add_argument("--llm-jitter", type=float, default=0.5, help="Extra random stub latency.")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark(parse_args()))
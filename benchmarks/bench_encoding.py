@@ -0,0 +1,85 @@
+# benchmarks/bench_encoding.py
+"""
+Compare bytes on the wire and serialization time for /analyze_cv payloads.
+
+Usage:
+    python benchmarks/bench_encoding.py [--iterations 2000] [--cot-words 250]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_encoding import encode_payload, JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPES, orjson, msgpack
+
+CRITERIA = [
+    "Awards", "Membership", "Press", "Judging", "Original Contribution",
+    "Scholarly Articles", "Critical Employment", "High Remuneration",
+]
+
+
+def build_verbose_payload(cot_words: int) -> dict:
+    """
+    Build a verbose analysis result shaped like perform_analysis output, with a
+    chain_of_thought of roughly cot_words words for every criterion.
+    """
+    reasoning = " ".join(["The applicant's resume describes relevant evidence for this criterion."] * (cot_words // 9 + 1))
+    criteria_results = {
+        name: {
+            "rating": 4,
+            "chain_of_thought": reasoning,
+            "evidence_list": [f"{name} evidence item {i}" for i in range(5)],
+        }
+        for name in CRITERIA
+    }
+    criteria_results["super_criteria"] = {
+        "rating": 9,
+        "chain_of_thought": reasoning,
+        "evidence_list": ["Turing Award, 2019"],
+    }
+    return {"criteria_results": criteria_results, "eligibility_rating": "high"}
+
+
+def time_encoder(encode, iterations: int) -> tuple:
+    """
+    Run encode() repeatedly and return (payload bytes, microseconds per call).
+    """
+    body = encode()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encode()
+    elapsed = time.perf_counter() - start
+    return body, elapsed / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--cot-words", type=int, default=250)
+    args = parser.parse_args()
+
+    payload = build_verbose_payload(args.cot_words)
+    encoders = {
+        "json indent=4 (previous default)": lambda: json.dumps(payload, indent=4).encode("utf-8"),
+        "json compact": lambda: encode_payload(payload, JSON_MEDIA_TYPE),
+    }
+    if orjson is None:
+        print("orjson not installed; 'json compact' uses the standard library encoder.")
+    if msgpack is not None:
+        encoders["msgpack"] = lambda: encode_payload(payload, MSGPACK_MEDIA_TYPES[0])
+    else:
+        print("msgpack not installed; skipping MessagePack.")
+
+    print(f"{'encoding':<34}{'bytes':>10}{'gzip bytes':>12}{'us/encode':>12}{'us/gzip':>10}")
+    for name, encode in encoders.items():
+        body, encode_us = time_encoder(encode, args.iterations)
+        compressed, gzip_us = time_encoder(lambda: gzip.compress(body, compresslevel=9), max(1, args.iterations // 10))
+        print(f"{name:<34}{len(body):>10}{len(compressed):>12}{encode_us:>12.1f}{gzip_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# benchmarks/bench_scaling.py
+"""
+Measure how /analyze_cv throughput scales with the number of serve.py worker processes.
+
+For each worker count, a stub-LLM server is started with `python -m benchmarks.stub_llm
+--workers N`, driven by a closed loop of `--concurrency-per-worker * N` clients sending
+requests back to back, and then stopped with SIGTERM. The shared cache is disabled, so every
+request pays for extraction, cleaning and the (stubbed) analysis. With a short stub latency
+the per-request cost is dominated by CPU work, which is what extra workers parallelize.
+
+Usage:
+    python -m benchmarks.bench_scaling --workers 1,2,4,8 --duration 15
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.load_test import load_corpus, send_request, summarize
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int, latency: float, jitter: float, startup_timeout: float = 60.0) -> subprocess.Popen:
+    """
+    Start a stub-LLM server with the given number of workers and wait until it answers.
+    """
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_llm", "--workers", str(workers), "--port", str(port),
+         "--latency", str(latency), "--jitter", str(jitter)],
+        cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + startup_timeout
+    while True:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/metrics/executors", timeout=1.0)
+            return server
+        except httpx.TransportError:
+            if server.poll() is not None or time.time() > deadline:
+                server.kill()
+                raise RuntimeError(f"Server with {workers} workers failed to start")
+            time.sleep(0.2)
+
+
+def stop_server(server: subprocess.Popen, timeout: float = 90.0) -> int:
+    server.send_signal(signal.SIGTERM)
+    try:
+        return server.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        return server.wait()
+
+
+async def run_closed_loop(url: str, corpus: list, concurrency: int, duration: float, timeout: float) -> dict:
+    """
+    Keep `concurrency` requests in flight for `duration` seconds and summarize the outcome.
+    """
+    outcomes = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        async def client_loop(offset: int):
+            index = offset
+            while loop.time() - start < duration:
+                outcomes.append(await send_request(client, corpus[index % len(corpus)], timeout))
+                index += 1
+
+        await asyncio.gather(*(client_loop(i) for i in range(concurrency)))
+        elapsed = loop.time() - start
+    return summarize(outcomes, elapsed, rate=0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="*", help="Resume files or directories to replay.")
+    parser.add_argument("--workers", type=lambda v: [int(n) for n in v.split(",")], default=None,
+                        help="Comma-separated worker counts (default: powers of two up to the CPU count).")
+    parser.add_argument("--concurrency-per-worker", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per worker count.")
+    parser.add_argument("--timeout", type=float, default=90.0, help="Client-side request timeout in seconds.")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Stub LLM latency per call.")
+    parser.add_argument("--llm-jitter", type=float, default=0.0, help="Extra random stub latency.")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({1, cpus} | {2 ** i for i in range(cpus.bit_length()) if 2 ** i <= cpus})
+    corpus = load_corpus(args.corpus)
+
+    print(f"{cpus} CPUs; stub LLM latency {args.llm_latency}s")
+    print(f"{'workers':>8}{'clients':>9}{'ok':>7}{'req/s':>9}{'p50':>8}{'p99':>8}{'errors':>8}{'speedup':>9}{'eff.':>7}")
+    baseline = None
+    for workers in worker_counts:
+        port = free_port()
+        server = start_server(workers, port, args.llm_latency, args.llm_jitter)
+        concurrency = args.concurrency_per_worker * workers
+        try:
+            row = asyncio.run(run_closed_loop(f"http://127.0.0.1:{port}", corpus, concurrency, args.duration, args.timeout))
+        finally:
+            stop_server(server)
+        baseline = baseline or row["throughput"] or None
+        speedup = row["throughput"] / baseline if baseline else 0.0
+        fmt = lambda v: "-" if v is None else f"{v:.2f}"
+        print(f"{workers:>8}{concurrency:>9}{row['ok']:>7}{row['throughput']:>9.2f}{fmt(row['p50']):>8}"
+              f"{fmt(row['p99']):>8}{row['error_rate']:>8.1%}{speedup:>8.2f}x{speedup / workers:>7.0%}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
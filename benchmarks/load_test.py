@@ -0,0 +1,201 @@
+# benchmarks/load_test.py
+"""
+Open-loop load generator for /analyze_cv.
+
+Replays a corpus of PDF/TXT resumes at Poisson arrival rates and reports throughput,
+p50/p95/p99 latency and error rates for each rate. By default the app is driven in-process
+with a stubbed LLM, and an event-loop lag monitor samples the stack whenever synchronous
+work blocks the loop. With --url, requests go to a running server instead (start one with
+a stubbed LLM using `python -m benchmarks.stub_llm`).
+
+Usage:
+    python -m benchmarks.load_test --rates 1,2,4,8 --duration 20
+    python -m benchmarks.load_test --manifest corpus.jsonl --url http://localhost:8000
+
+A manifest is a JSONL file with one request per line, e.g.
+    {"path": "testResume.pdf", "verbose": false}
+Relative paths are resolved against the manifest's directory.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from loop_monitor import EventLoopLagMonitor, percentile
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".text")
+
+
+def load_corpus(paths: list = None, manifest: str = None) -> list:
+    """
+    Load request items from files, directories (non-recursive) and/or a JSONL manifest.
+
+    Returns a list of dicts with "filename", "content" and "verbose" keys. Falls back to
+    testResume.pdf when nothing is given.
+    """
+    entries = []
+    for path in paths or []:
+        if os.path.isdir(path):
+            entries.extend(
+                {"path": os.path.join(path, name)} for name in sorted(os.listdir(path))
+                if name.lower().endswith(SUPPORTED_EXTENSIONS)
+            )
+        else:
+            entries.append({"path": path})
+    if manifest:
+        base_dir = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entry["path"] = os.path.join(base_dir, entry["path"])
+                    entries.append(entry)
+    if not entries:
+        entries.append({"path": os.path.join(REPO_ROOT, "testResume.pdf")})
+
+    corpus = []
+    for entry in entries:
+        with open(entry["path"], "rb") as f:
+            content = f.read()
+        corpus.append({
+            "filename": os.path.basename(entry["path"]),
+            "content": content,
+            "verbose": bool(entry.get("verbose", False))
+        })
+    return corpus
+
+
+async def send_request(client: httpx.AsyncClient, item: dict, timeout: float) -> tuple:
+    """
+    Upload one resume and return (status, latency in seconds). Transport errors report status "error".
+    """
+    start = time.perf_counter()
+    try:
+        response = await client.post(
+            "/analyze_cv",
+            params={"verbose": str(item["verbose"]).lower()},
+            files={"cv": (item["filename"], item["content"])},
+            timeout=timeout
+        )
+        status = response.status_code
+    except (httpx.HTTPError, asyncio.TimeoutError) as e:
+        status = f"error:{type(e).__name__}"
+    return status, time.perf_counter() - start
+
+
+async def run_rate(client: httpx.AsyncClient, corpus: list, rate: float, duration: float, timeout: float, rng: random.Random) -> dict:
+    """
+    Send requests with exponentially distributed inter-arrival times (open loop) for `duration`
+    seconds and summarize the outcome once every request has finished.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    next_arrival = start
+    tasks = []
+    while True:
+        next_arrival += rng.expovariate(rate)
+        if next_arrival - start > duration:
+            break
+        await asyncio.sleep(max(0.0, next_arrival - loop.time()))
+        tasks.append(asyncio.create_task(send_request(client, rng.choice(corpus), timeout)))
+
+    outcomes = await asyncio.gather(*tasks)
+    elapsed = loop.time() - start
+    return summarize(outcomes, elapsed, rate)
+
+
+def summarize(outcomes: list, elapsed: float, rate: float) -> dict:
+    """
+    Reduce (status, latency) pairs to throughput, latency percentiles and error rates.
+    """
+    statuses = Counter(status for status, _ in outcomes)
+    ok_latencies = sorted(latency for status, latency in outcomes if status == 200)
+    sent = len(outcomes)
+    return {
+        "rate": rate,
+        "sent": sent,
+        "ok": len(ok_latencies),
+        "throughput": len(ok_latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(ok_latencies, 50),
+        "p95": percentile(ok_latencies, 95),
+        "p99": percentile(ok_latencies, 99),
+        "error_rate": (sent - len(ok_latencies)) / sent if sent else 0.0,
+        "statuses": dict(statuses)
+    }
+
+
+def format_row(row: dict) -> str:
+    fmt = lambda v: "-" if v is None else f"{v:.2f}"
+    statuses = ", ".join(f"{k}:{v}" for k, v in sorted(row["statuses"].items(), key=str))
+    return (f"{row['rate']:>7.2f}{row['sent']:>7}{row['ok']:>7}{row['throughput']:>9.2f}"
+            f"{fmt(row['p50']):>8}{fmt(row['p95']):>8}{fmt(row['p99']):>8}{row['error_rate']:>8.1%}  {statuses}")
+
+
+async def run_load_test(args) -> list:
+    corpus = load_corpus(args.corpus, args.manifest)
+    rng = random.Random(args.seed)
+    monitor = None
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url)
+    else:
+        from benchmarks.stub_llm import install_stub_llm
+        from config import settings
+        from shared_cache import close_cache
+        import main
+
+        install_stub_llm(latency=args.llm_latency, jitter=args.llm_jitter, seed=args.seed)
+        # Keep stub results out of the analysis history, and replayed CVs out of the shared cache.
+        main.history_store = None
+        settings.shared_cache_path = None
+        close_cache()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://loadtest")
+        monitor = EventLoopLagMonitor(threshold=args.stall_threshold)
+        monitor.start()
+
+    rows = []
+    print(f"{'rate':>7}{'sent':>7}{'ok':>7}{'req/s':>9}{'p50':>8}{'p95':>8}{'p99':>8}{'errors':>8}  statuses")
+    async with client:
+        for rate in args.rates:
+            row = await run_rate(client, corpus, rate, args.duration, args.timeout, rng)
+            rows.append(row)
+            print(format_row(row), flush=True)
+
+    if monitor is not None:
+        await monitor.stop()
+        report = monitor.report()
+        fmt = lambda v: "-" if v is None else f"{v * 1000:.1f}ms"
+        print(f"\nEvent loop lag: p50 {fmt(report['lag_p50'])}, p99 {fmt(report['lag_p99'])}, "
+              f"max {fmt(report['lag_max'])}, stalls over {args.stall_threshold * 1000:.0f}ms: {report['stalls']}")
+        for sample in report["stall_stacks"]:
+            print(f"\n--- {sample['count']} stall(s) at:\n{sample['stack']}")
+    return rows
+
+
+def parse_args(argv: list = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="*", help="Resume files or directories to replay.")
+    parser.add_argument("--manifest", help="JSONL manifest of requests ({\"path\": ..., \"verbose\": ...}).")
+    parser.add_argument("--url", help="Target a running server instead of the in-process app.")
+    parser.add_argument("--rates", type=lambda v: [float(r) for r in v.split(",")], default=[1.0, 2.0, 4.0],
+                        help="Comma-separated arrival rates in requests per second.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of arrivals per rate.")
+    parser.add_argument("--timeout", type=float, default=90.0, help="Client-side request timeout in seconds.")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Stub LLM latency per call (in-process only).")
+    parser.add_argument("--llm-jitter", type=float, default=0.5, help="Extra random stub latency (in-process only).")
+    parser.add_argument("--stall-threshold", type=float, default=0.1, help="Loop lag in seconds that counts as a stall.")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(run_load_test(parse_args()))
@@ -0,0 +1,88 @@
+# benchmarks/stub_llm.py
+import json
+import os
+import sys
+import random
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StubChatModel:
+    """
+    Offline stand-in for the LangChain chat client used by analysis.py.
+
+    invoke() and stream() block the calling thread for `latency` seconds (plus up to `jitter`),
+    like a real HTTP call would, then return a canned criterion result with a random rating.
+    """
+
+    def __init__(self, latency: float = 1.0, jitter: float = 0.5, seed: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def _completion(self) -> str:
+        time.sleep(self.latency + self._random.uniform(0, self.jitter))
+        rating = self._random.randint(1, 10)
+        return json.dumps({
+            "rating": rating,
+            "evidence_list": [f"Stub evidence {i}" for i in range(3)],
+            "confidence": 8,
+            "chain_of_thought": "Stub reasoning. " * 40
+        })
+
+    def invoke(self, messages, **kwargs):
+        return SimpleNamespace(content=self._completion())
+
+    def stream(self, messages, **kwargs):
+        content = self._completion()
+        for i in range(0, len(content), 16):
+            yield SimpleNamespace(content=content[i:i + 16])
+
+
+def install_stub_llm(latency: float = 1.0, jitter: float = 0.5, seed: int = None) -> StubChatModel:
+    """
+    Route every model used by analysis.py (primary and cascade tiers) to one StubChatModel.
+    """
+    import analysis
+
+    stub = StubChatModel(latency=latency, jitter=jitter, seed=seed)
+    analysis.llm = stub
+    analysis.get_llm = lambda model: stub
+    return stub
+
+
+def serve():
+    """
+    Run main:app with the stub LLM and the event-loop lag monitor enabled, as a target for
+    `python -m benchmarks.load_test --url ...`. With --workers N the app is served by N
+    forked workers (see serve.py), all using the stub.
+    """
+    import argparse
+    from config import settings
+    from serve import run_prefork
+
+    parser = argparse.ArgumentParser(description="Serve main:app with a stubbed LLM.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--shared-cache", action="store_true",
+                        help="Keep the shared cache enabled (replayed CVs are then served from it).")
+    args = parser.parse_args()
+
+    settings.loop_monitor_enabled = True
+    if not args.shared_cache:
+        settings.shared_cache_path = None
+    install_stub_llm(latency=args.latency, jitter=args.jitter)
+    import main
+
+    # Keep stub results out of the analysis history.
+    main.history_store = None
+    run_prefork(main.app, args.host, args.port, args.workers, settings.graceful_shutdown_timeout)
+
+
+if __name__ == "__main__":
+    serve()
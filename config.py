@@ -1,16 +1,86 @@
 import os
 import yaml
-from pydantic import BaseModel, ValidationError
+from typing import Optional
+from pydantic import BaseModel, Field, ValidationError, field_validator
 from dotenv import load_dotenv
 
 # Load environment variables from .env file (if present)
 load_dotenv(override=True)
 
+class ExecutorSettings(BaseModel):
+    workers: int
+    # Tasks allowed to wait for a worker before new submissions are rejected.
+    queue_limit: int
+    # Run the stage in worker processes instead of threads (CPU-bound stages only).
+    use_processes: bool = False
+
+def default_executors() -> dict:
+    return {
+        "extraction": ExecutorSettings(workers=4, queue_limit=32),
+        "cleaning": ExecutorSettings(workers=2, queue_limit=64),
+        "llm": ExecutorSettings(workers=32, queue_limit=256),
+        "history": ExecutorSettings(workers=2, queue_limit=64),
+    }
+
 class Settings(BaseModel):
     visa_data_path: str
     llm_api_endpoint: str
     llm_model: str
     openai_api_key: str
+    # Responses larger than this many bytes are gzip-compressed when the client accepts it.
+    gzip_minimum_size: int = 1024
+    # Skip the LLM call for criteria whose keywords do not appear in the CV (see prescreen.py).
+    prescreen_enabled: bool = False
+    # Model cascade: evaluate with cascade_model first and escalate to llm_model when the rating is
+    # within cascade_borderline_band of the pass threshold, unparseable, or below cascade_min_confidence.
+    cascade_enabled: bool = False
+    cascade_model: str = "gpt-4o-mini"
+    cascade_borderline_band: int = 2
+    cascade_min_confidence: int = 7
+    # Stream completions and parse fields incrementally; non-verbose requests stop once the
+    # rating and evidence are in, with stream_brief_max_tokens as their token budget.
+    llm_streaming: bool = False
+    stream_brief_max_tokens: int = 300
+    # Log a stack sample whenever the event loop is blocked for longer than loop_stall_threshold seconds.
+    loop_monitor_enabled: bool = False
+    loop_stall_threshold: float = 0.1
+    # SQLite file storing every analysis for offline re-scoring; None disables the history.
+    history_db_path: Optional[str] = None
+    # Reuse stored results for criteria unaffected by a revised CV; a CV is treated as a revision
+    # when at least revision_min_overlap of its sections match a stored analysis.
+    incremental_reanalysis: bool = True
+    revision_min_overlap: float = 0.5
+    # SQLite file caching cleaned CV text and finished analyses across worker processes (see
+    # shared_cache.py); entries expire after shared_cache_ttl seconds. None disables the cache.
+    shared_cache_path: Optional[str] = None
+    shared_cache_ttl: float = 86400
+    # Worker processes started by serve.py (None uses one per CPU), and how long each worker may
+    # spend draining in-flight requests on shutdown.
+    serve_workers: Optional[int] = None
+    graceful_shutdown_timeout: float = 65
+    # Seconds an /analyze_cv request may take, including time spent waiting for admission.
+    analysis_timeout: float = 60
+    # Admission control (see admission.py): at most admission_max_concurrent analyses per worker
+    # process, with up to admission_queue_limit more waiting. 0 disables admission control.
+    admission_max_concurrent: int = 4
+    admission_queue_limit: int = 8
+    # Worker pools per pipeline stage (see executors.py).
+    executors: dict[str, ExecutorSettings] = Field(default_factory=default_executors)
+
+    @field_validator("executors", mode="before")
+    @classmethod
+    def merge_executor_defaults(cls, value):
+        # config.yaml may configure only some stages, or only some fields of a stage;
+        # everything left out keeps its default.
+        if not isinstance(value, dict):
+            return value
+        merged = {name: config.model_dump() for name, config in default_executors().items()}
+        for name, config in value.items():
+            if isinstance(config, dict) and name in merged:
+                merged[name] = {**merged[name], **config}
+            else:
+                merged[name] = config
+        return merged
 
 def load_settings() -> Settings:
     # Path to YAML configuration file.
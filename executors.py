@@ -0,0 +1,173 @@
+# executors.py
+import asyncio
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Dedicated worker pools per pipeline stage, so a burst of work in one stage (e.g. large PDFs)
+# cannot starve another (e.g. LLM calls) the way a single shared asyncio.to_thread pool does.
+# Pools are sized from settings.executors and created lazily, which keeps them fork-safe.
+
+
+class PoolSaturatedError(Exception):
+    """
+    Raised when a stage pool already holds its maximum number of running and queued tasks;
+    retry_after is the suggested client back-off in seconds.
+    """
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _timed_call(fn, args):
+    # Runs in the worker (thread or process); the start time lets the caller measure queue wait.
+    return time.time(), fn(*args)
+
+
+class StagePool:
+    """
+    A bounded thread or process pool for one pipeline stage, with saturation metrics.
+
+    At most `workers` tasks run at once and at most `queue_limit` more may wait; further
+    submissions raise PoolSaturatedError instead of queueing without bound.
+    """
+
+    def __init__(self, name: str, workers: int, queue_limit: int, use_processes: bool = False):
+        self.name = name
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.use_processes = use_processes
+        self._executor = None
+        # Counters are updated from executor callbacks (worker threads), so guard them.
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.peak_pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.run_time_total = 0.0
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.use_processes:
+                # Spawned (not forked) workers avoid inheriting the server's threads and locks.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{self.name}-pool")
+        return self._executor
+
+    async def run(self, fn, *args):
+        """
+        Run fn(*args) in the pool and return its result.
+        For process pools, fn and args must be picklable (i.e. module-level functions).
+
+        A task holds its slot until the worker finishes it, even if the awaiting coroutine is
+        cancelled (e.g. by a request timeout); a task cancelled before it starts is dropped.
+        """
+        with self._lock:
+            if self._pending >= self.workers + self.queue_limit:
+                self.rejected += 1
+                # A slot frees up when a running task finishes, typically within one mean run time.
+                retry_after = max(1, math.ceil(self.run_time_total / (self.completed or 1)))
+                raise PoolSaturatedError(f"The {self.name} pool is saturated ({self._pending} tasks in flight).",
+                                         retry_after)
+            self._pending += 1
+            self.submitted += 1
+            self.peak_pending = max(self.peak_pending, self._pending)
+
+        submitted_at = time.time()
+        try:
+            future = self._get_executor().submit(_timed_call, fn, args)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+                self.failed += 1
+            raise
+        future.add_done_callback(lambda f: self._task_done(f, submitted_at))
+        _, result = await asyncio.wrap_future(future)
+        return result
+
+    def _task_done(self, future, submitted_at: float):
+        # Runs when the worker finishes (or the task is cancelled before starting), which may be
+        # long after the caller stopped waiting.
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled():
+                self.cancelled += 1
+            elif future.exception() is not None:
+                self.failed += 1
+            else:
+                started_at, _ = future.result()
+                self.completed += 1
+                self.queue_wait_total += max(0.0, started_at - submitted_at)
+                self.run_time_total += time.time() - started_at
+
+    def metrics(self) -> dict:
+        """
+        Return counters and current saturation (in-flight tasks over total capacity).
+        """
+        finished = self.completed or 1
+        return {
+            "kind": "process" if self.use_processes else "thread",
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "in_flight": self._pending,
+            "queued": max(0, self._pending - self.workers),
+            "saturation": self._pending / (self.workers + self.queue_limit),
+            "peak_in_flight": self.peak_pending,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "mean_queue_wait": self.queue_wait_total / finished,
+            "mean_run_time": self.run_time_total / finished
+        }
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+_pools = {}
+
+
+def get_pool(name: str) -> StagePool:
+    """
+    Return the pool for a stage ("extraction", "cleaning", "llm" or "history"), creating it from settings on first use.
+    """
+    if name not in _pools:
+        config = settings.executors[name]
+        _pools[name] = StagePool(name, config.workers, config.queue_limit, config.use_processes)
+        logger.info(f"Created {name} pool: {_pools[name].metrics()['kind']}, {config.workers} workers")
+    return _pools[name]
+
+
+def pool_metrics() -> dict:
+    """
+    Return the metrics of every pool created so far, keyed by stage name.
+    """
+    return {name: pool.metrics() for name, pool in _pools.items()}
+
+
+def shutdown_pools(wait: bool = True):
+    """
+    Shut down all pools; they are recreated on next use.
+    """
+    for pool in _pools.values():
+        pool.shutdown(wait=wait)
+    _pools.clear()
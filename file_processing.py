@@ -2,6 +2,16 @@ from fastapi import UploadFile, HTTPException
 import asyncio
 import fitz  # PyMuPDF
 from data_cleanser import clean_text
+from executors import get_pool, PoolSaturatedError
+from shared_cache import content_digest, cache_get, cache_set
+
+BUSY_DETAIL = "Server is busy; please retry."
+
+def busy_error(e: PoolSaturatedError) -> HTTPException:
+    """
+    Build the 503 response for a saturated stage pool, with the pool's suggested Retry-After.
+    """
+    return HTTPException(status_code=503, detail=BUSY_DETAIL, headers={"Retry-After": str(e.retry_after)})
 
 def extract_text_from_pdf(data: bytes) -> str:
     """
@@ -23,6 +33,15 @@ def extract_text_from_pdf(data: bytes) -> str:
     except fitz.FitzError as e:
         raise Exception(f"An error occurred processing the PDF: {e}")
 
+async def clean_text_async(text: str) -> str:
+    """
+    Run clean_text in the dedicated cleaning pool instead of on the event loop.
+    """
+    try:
+        return await get_pool("cleaning").run(clean_text, text)
+    except PoolSaturatedError as e:
+        raise busy_error(e)
+
 async def process_pdf(file: UploadFile) -> str:
     """
     Asynchronously process a PDF file:
@@ -35,10 +54,18 @@ async def process_pdf(file: UploadFile) -> str:
     
     if not file_bytes:
         raise HTTPException(status_code=400, detail="Uploaded PDF is empty.")
+
+    # Identical uploads reuse text already extracted by any worker process.
+    cache_key = f"pdf:{content_digest(file_bytes)}"
+    cached_text = await cache_get("extraction", cache_key)
+    if cached_text is not None:
+        return cached_text
     
     try:
-        # Run the blocking PDF extraction in a separate thread.
-        extracted_text = await asyncio.to_thread(extract_text_from_pdf, file_bytes)
+        # Run the blocking PDF extraction in the dedicated extraction pool.
+        extracted_text = await get_pool("extraction").run(extract_text_from_pdf, file_bytes)
+    except PoolSaturatedError as e:
+        raise busy_error(e)
     except asyncio.TimeoutError:
         raise HTTPException(status_code=504, detail="Processing timed out.")
     except asyncio.CancelledError:
@@ -51,12 +78,13 @@ async def process_pdf(file: UploadFile) -> str:
     if not extracted_text.strip():
         raise HTTPException(status_code=400, detail="No text could be extracted from the PDF.")
     
-    # Clean the extracted text.
-    cleaned_text = clean_text(extracted_text.strip())
+    # Clean the extracted text off the event loop.
+    cleaned_text = await clean_text_async(extracted_text.strip())
     
     if not cleaned_text:
         raise HTTPException(status_code=400, detail="No text could be extracted from the PDF.")
-    
+
+    await cache_set("extraction", cache_key, cleaned_text)
     return cleaned_text
 
 async def process_docx(file: UploadFile) -> str:
@@ -82,6 +110,11 @@ async def process_text(file: UploadFile) -> str:
         A cleaned version of the plain text content.
     """
     content = await file.read()
+    cache_key = f"text:{content_digest(content)}"
+    cached_text = await cache_get("extraction", cache_key)
+    if cached_text is not None:
+        return cached_text
+
     # Decode with error replacement
     decoded = content.decode('utf-8', errors='replace')
     
@@ -93,5 +126,6 @@ async def process_text(file: UploadFile) -> str:
         raise HTTPException(status_code=400, detail="Text file contains too many invalid characters.")
     
     # Clean the text (this step normalizes spacing while preserving newlines/tabs)
-    cleaned = clean_text(decoded)
+    cleaned = await clean_text_async(decoded)
+    await cache_set("extraction", cache_key, cleaned)
     return cleaned
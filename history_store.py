@@ -0,0 +1,250 @@
+# history_store.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Local SQLite store of every analysis, so results can be re-scored offline (see rescore.py)
+# without repeating the LLM calls. Analyses are keyed by CV digest, criteria fingerprint and
+# model; re-analysing the same key replaces the stored criterion results. CV sections (see
+# revision.py) are stored too, so a revised CV can be matched to its earlier analysis. Each
+# result is kept verbatim as JSON alongside the columns used for re-scoring, and flagged as
+# brief when it was produced without chain-of-thought (non-verbose streaming).
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    cv_digest TEXT NOT NULL,
+    criteria_fingerprint TEXT NOT NULL,
+    model TEXT NOT NULL,
+    eligibility_rating TEXT,
+    created_at REAL NOT NULL,
+    UNIQUE (cv_digest, criteria_fingerprint, model)
+);
+CREATE TABLE IF NOT EXISTS criterion_results (
+    analysis_id INTEGER NOT NULL REFERENCES analyses (id) ON DELETE CASCADE,
+    criterion TEXT NOT NULL,
+    rating INTEGER,
+    confidence INTEGER,
+    tier TEXT,
+    chain_of_thought TEXT,
+    evidence_list TEXT,
+    error TEXT,
+    brief INTEGER NOT NULL DEFAULT 0,
+    result_json TEXT,
+    PRIMARY KEY (analysis_id, criterion)
+);
+CREATE TABLE IF NOT EXISTS cv_sections (
+    analysis_id INTEGER NOT NULL REFERENCES analyses (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    heading TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (analysis_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_fingerprint_model ON analyses (criteria_fingerprint, model);
+CREATE INDEX IF NOT EXISTS idx_cv_sections_digest ON cv_sections (digest);
+"""
+
+
+def cv_digest(cv_text: str) -> str:
+    """
+    Return the SHA-256 hex digest of the cleaned CV text.
+    """
+    return hashlib.sha256(cv_text.encode("utf-8")).hexdigest()
+
+
+def criteria_fingerprint(visa_info: dict) -> str:
+    """
+    Return a SHA-256 fingerprint of the criteria data, so results evaluated against different
+    criteria text are never mixed.
+    """
+    return hashlib.sha256(json.dumps(visa_info, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class HistoryStore:
+    """
+    SQLite-backed history of analysis results.
+
+    The connection is opened lazily and reopened after a fork, and writes are serialized with
+    a lock, so one instance can be shared by the worker threads of a process.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(SCHEMA)
+            _migrate(conn)
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def record(self, digest: str, fingerprint: str, model: str, criteria_results: dict, eligibility_rating: str,
+               sections: list = None, brief_criteria=()) -> int:
+        """
+        Store one analysis and its criterion results, replacing any earlier analysis with the same key.
+
+        Args:
+            criteria_results (dict): Mapping of criterion name to its result dict (rating, chain_of_thought,
+                                     evidence_list, and optionally confidence, tier or error). The
+                                     super-criteria result is stored under its own name like any other criterion.
+            sections (list): Optional CV sections from revision.split_sections.
+            brief_criteria: Names of the criteria whose results were produced without chain-of-thought.
+
+        Returns:
+            int: The analysis id.
+        """
+        with self._lock:
+            conn = self.connection()
+            with conn:
+                row = conn.execute(
+                    "SELECT id FROM analyses WHERE cv_digest = ? AND criteria_fingerprint = ? AND model = ?",
+                    (digest, fingerprint, model)
+                ).fetchone()
+                if row:
+                    analysis_id = row[0]
+                    conn.execute("DELETE FROM criterion_results WHERE analysis_id = ?", (analysis_id,))
+                    conn.execute("DELETE FROM cv_sections WHERE analysis_id = ?", (analysis_id,))
+                    conn.execute(
+                        "UPDATE analyses SET eligibility_rating = ?, created_at = ? WHERE id = ?",
+                        (eligibility_rating, time.time(), analysis_id)
+                    )
+                else:
+                    analysis_id = conn.execute(
+                        "INSERT INTO analyses (cv_digest, criteria_fingerprint, model, eligibility_rating, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (digest, fingerprint, model, eligibility_rating, time.time())
+                    ).lastrowid
+                conn.executemany(
+                    "INSERT INTO criterion_results "
+                    "(analysis_id, criterion, rating, confidence, tier, chain_of_thought, evidence_list, error, brief, result_json) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [_result_row(analysis_id, name, result, name in brief_criteria)
+                     for name, result in criteria_results.items()]
+                )
+                conn.executemany(
+                    "INSERT INTO cv_sections (analysis_id, position, heading, digest, text) VALUES (?, ?, ?, ?, ?)",
+                    [(analysis_id, idx, s["heading"], s["digest"], s["text"]) for idx, s in enumerate(sections or [])]
+                )
+        return analysis_id
+
+    def load(self, digest: str, fingerprint: str, model: str) -> dict:
+        """
+        Return the stored analysis for a key as {"criteria_results": ..., "eligibility_rating": ...,
+        "brief_criteria": ...}, or None. Results are returned exactly as they were recorded.
+        """
+        with self._lock:
+            conn = self.connection()
+            row = conn.execute(
+                "SELECT id, eligibility_rating FROM analyses WHERE cv_digest = ? AND criteria_fingerprint = ? AND model = ?",
+                (digest, fingerprint, model)
+            ).fetchone()
+            if row is None:
+                return None
+            results = conn.execute(
+                "SELECT criterion, rating, confidence, tier, chain_of_thought, evidence_list, error, brief, result_json "
+                "FROM criterion_results WHERE analysis_id = ?",
+                (row[0],)
+            ).fetchall()
+        return {
+            "criteria_results": {result[0]: _result_dict(result) for result in results},
+            "eligibility_rating": row[1],
+            "brief_criteria": {result[0] for result in results if result[7]}
+        }
+
+    def find_revision_candidate(self, section_digests: list, fingerprint: str, model: str) -> dict:
+        """
+        Find the stored analysis (same criteria fingerprint and model) sharing the most CV sections.
+
+        Returns None if no stored analysis shares a section; otherwise a dict with "analysis_id",
+        "cv_digest", "sections" (heading, digest and text of each stored section),
+        "criteria_results" and "brief_criteria".
+        """
+        if not section_digests:
+            return None
+        placeholders = ",".join("?" * len(section_digests))
+        with self._lock:
+            conn = self.connection()
+            row = conn.execute(
+                f"SELECT a.id, a.cv_digest FROM cv_sections s JOIN analyses a ON a.id = s.analysis_id "
+                f"WHERE s.digest IN ({placeholders}) AND a.criteria_fingerprint = ? AND a.model = ? "
+                f"GROUP BY a.id ORDER BY COUNT(DISTINCT s.digest) DESC, a.created_at DESC LIMIT 1",
+                (*section_digests, fingerprint, model)
+            ).fetchone()
+            if row is None:
+                return None
+            sections = conn.execute(
+                "SELECT heading, digest, text FROM cv_sections WHERE analysis_id = ? ORDER BY position",
+                (row[0],)
+            ).fetchall()
+        stored = self.load(row[1], fingerprint, model)
+        return {
+            "analysis_id": row[0],
+            "cv_digest": row[1],
+            "sections": [{"heading": h, "digest": d, "text": t} for h, d, t in sections],
+            "criteria_results": stored["criteria_results"] if stored else {},
+            "brief_criteria": stored["brief_criteria"] if stored else set()
+        }
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+def _migrate(conn: sqlite3.Connection):
+    # Databases created before results were stored verbatim lack the newer columns.
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(criterion_results)")}
+    with conn:
+        if "brief" not in columns:
+            conn.execute("ALTER TABLE criterion_results ADD COLUMN brief INTEGER NOT NULL DEFAULT 0")
+        if "result_json" not in columns:
+            conn.execute("ALTER TABLE criterion_results ADD COLUMN result_json TEXT")
+
+
+def _result_row(analysis_id: int, criterion: str, result: dict, brief: bool = False) -> tuple:
+    rating = result.get("rating")
+    confidence = result.get("confidence")
+    return (
+        analysis_id,
+        criterion,
+        rating if isinstance(rating, int) else None,
+        confidence if isinstance(confidence, int) else None,
+        result.get("tier"),
+        result.get("chain_of_thought"),
+        json.dumps(result["evidence_list"]) if "evidence_list" in result else None,
+        result.get("error"),
+        int(brief),
+        json.dumps(result)
+    )
+
+
+def _result_dict(row: tuple) -> dict:
+    _, rating, confidence, tier, chain_of_thought, evidence_list, error, _, result_json = row
+    if result_json is not None:
+        return json.loads(result_json)
+    # Rows written before results were stored verbatim.
+    if error is not None:
+        return {"error": error}
+    result = {
+        "rating": rating,
+        "chain_of_thought": chain_of_thought,
+        "evidence_list": json.loads(evidence_list) if evidence_list else [],
+        "confidence": confidence
+    }
+    if tier is not None:
+        result["tier"] = tier
+    return result
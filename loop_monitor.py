@@ -0,0 +1,111 @@
+# loop_monitor.py
+import asyncio
+import logging
+import math
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopLagMonitor:
+    """
+    Detect synchronous work blocking the asyncio event loop.
+
+    A heartbeat task sleeps for `interval` seconds and records how late it wakes up (the loop lag).
+    A watchdog thread checks the heartbeat; when the loop has not ticked for `threshold` seconds it
+    samples the innermost `stack_depth` frames of the loop thread, so the blocking call shows up in the report.
+    """
+
+    def __init__(self, interval: float = 0.02, threshold: float = 0.1, max_lags: int = 100_000, stack_depth: int = 12):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_lags = max_lags
+        self.stack_depth = stack_depth
+        self.lags = []
+        self.stalls = 0
+        self.stack_samples = Counter()
+        self._loop_thread_id = None
+        self._last_beat = 0.0
+        self._stalled = False
+        self._task = None
+        self._watchdog = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """
+        Start monitoring the running event loop. Must be called from within the loop.
+        """
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        """
+        Stop the heartbeat task and the watchdog thread.
+        """
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+
+    async def _heartbeat(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+            self._stalled = False
+            if len(self.lags) < self.max_lags:
+                self.lags.append(max(0.0, now - start - self.interval))
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            behind = time.monotonic() - self._last_beat - self.interval
+            if behind < self.threshold or self._stalled:
+                continue
+            # Sample once per stall; the heartbeat clears the flag when the loop recovers.
+            self._stalled = True
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            # Keep the innermost frames, where the blocking call is.
+            stack = "".join(traceback.format_stack(frame)[-self.stack_depth:])
+            self.stack_samples[stack] += 1
+            logger.warning(f"Event loop blocked for {behind:.3f}s; stack:\n{stack}")
+
+    def report(self, top: int = 5) -> dict:
+        """
+        Summarize loop lag and the most common stacks sampled during stalls.
+        """
+        lags = sorted(self.lags)
+        return {
+            "samples": len(lags),
+            "lag_p50": percentile(lags, 50),
+            "lag_p99": percentile(lags, 99),
+            "lag_max": lags[-1] if lags else None,
+            "stalls": self.stalls,
+            "stall_stacks": [{"count": count, "stack": stack} for stack, count in self.stack_samples.most_common(top)]
+        }
+
+
+def percentile(sorted_values: list, q: float):
+    """
+    Return the q-th percentile (0-100) of an already sorted list using nearest-rank, or None if empty.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
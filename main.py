@@ -1,16 +1,23 @@
 # main.py
 import asyncio
 import sys
-from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Header
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import Response
 import uvicorn
-import json
 import time
 import logging
 from config import settings
 from data_loader import load_visa_data
-from file_processing import process_pdf, process_docx, process_text
-from analysis import perform_analysis
+from file_processing import process_pdf, process_docx, process_text, busy_error, BUSY_DETAIL
+from analysis import perform_analysis, analysis_model_key
+from response_encoding import negotiate_media_type, encode_payload
+from loop_monitor import EventLoopLagMonitor
+from executors import pool_metrics, shutdown_pools, PoolSaturatedError
+from history_store import HistoryStore, cv_digest, criteria_fingerprint
+from shared_cache import cache_get, cache_set, close_cache
+from admission import AdmissionController, AdmissionRejected
 
 # Attempt to load visa data; exit if the file is missing.
 try:
@@ -19,12 +26,42 @@ except FileNotFoundError as e:
     print(str(e))
     sys.exit(1)
 
+# Computed once at import; under serve.py this happens in the parent before the workers fork.
+o1a_fingerprint = criteria_fingerprint(o1a_criteria)
+
+# Every analysis is persisted for offline re-scoring when a history database is configured.
+history_store = HistoryStore(settings.history_db_path) if settings.history_db_path else None
+
+# Cap concurrent analyses and shed excess load early instead of letting every request time out.
+admission = AdmissionController(
+    settings.admission_max_concurrent, settings.admission_queue_limit, settings.analysis_timeout
+) if settings.admission_max_concurrent else None
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Optionally watch for synchronous work blocking the event loop.
+    monitor = None
+    if settings.loop_monitor_enabled:
+        monitor = EventLoopLagMonitor(threshold=settings.loop_stall_threshold)
+        monitor.start()
+    yield
+    shutdown_pools()
+    if history_store is not None:
+        history_store.close()
+    close_cache()
+    if monitor is not None:
+        await monitor.stop()
+        logger.info(f"Event loop lag report: {monitor.report()}")
+
+app = FastAPI(lifespan=lifespan)
+# Compress large (typically verbose) responses for clients that send Accept-Encoding: gzip.
+app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_minimum_size)
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -35,9 +72,20 @@ async def log_requests(request: Request, call_next):
     logger.info(f"Completed in {process_time:.2f}s with status code {response.status_code}")
     return response
 
-async def process_cv_and_analysis(cv: UploadFile) -> dict:
+def analysis_cache_key(cv_text: str, verbose: bool) -> str:
+    """
+    Key a finished analysis by CV, criteria, model configuration and every setting that changes
+    the result's content, so toggling a mode never serves results produced under another.
+    """
+    modes = f"v{int(verbose)}p{int(settings.prescreen_enabled)}s{int(settings.llm_streaming)}"
+    return f"{cv_digest(cv_text)}:{o1a_fingerprint}:{analysis_model_key()}:{modes}"
+
+async def process_cv_and_analysis(cv: UploadFile, verbose: bool = True, deadline_at: float = None) -> dict:
     """
     Process the CV file based on its type and run analysis against O1-A criteria.
+    Extraction and shared-cache hits run without an admission slot; only an analysis that
+    needs LLM calls waits for (or is shed by) admission control, against the time left
+    before deadline_at (a time.monotonic() value) rather than the full analysis timeout.
     """
     file_type = cv.filename.split('.')[-1].lower()
     logger.info(f"Processing CV from {cv.filename}")
@@ -51,9 +99,44 @@ async def process_cv_and_analysis(cv: UploadFile) -> dict:
     else:
         raise HTTPException(status_code=400, detail="Unsupported file type.")
     
-    analysis_result = await perform_analysis(cv_text, o1a_criteria)
+    # Analyses finished by any worker process are shared through the cache.
+    cache_key = analysis_cache_key(cv_text, verbose)
+    cached_result = await cache_get("analysis", cache_key)
+    if cached_result is not None:
+        logger.info("Serving analysis from the shared cache")
+        return cached_result
+
+    try:
+        if admission is None:
+            analysis_result = await perform_analysis(
+                cv_text, o1a_criteria, verbose=verbose, history=history_store, fingerprint=o1a_fingerprint
+            )
+        else:
+            # Admission only has what extraction and the cache lookup left of the deadline.
+            budget = deadline_at - time.monotonic() if deadline_at is not None else None
+            async with admission.slot(budget):
+                analysis_result = await perform_analysis(
+                    cv_text, o1a_criteria, verbose=verbose, history=history_store, fingerprint=o1a_fingerprint
+                )
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=503, detail=BUSY_DETAIL, headers={"Retry-After": str(e.retry_after)})
+    except PoolSaturatedError as e:
+        raise busy_error(e)
+
+    # Failed criteria should be retried, so only complete analyses are cached.
+    if not any(isinstance(r, dict) and "error" in r for r in analysis_result.get("criteria_results", {}).values()):
+        await cache_set("analysis", cache_key, analysis_result)
     return analysis_result
 
+def _filter_criterion(details: dict) -> dict:
+    """
+    Keep the rating and evidence list of a criterion result, plus the model tier when the cascade produced it.
+    """
+    filtered = {"rating": details.get("rating"), "evidence_list": details.get("evidence_list")}
+    if "tier" in details:
+        filtered["tier"] = details["tier"]
+    return filtered
+
 def filter_analysis_results(full_result: dict) -> dict:
     """
     Filter the analysis results to remove chain-of-thought reasoning.
@@ -64,33 +147,41 @@ def filter_analysis_results(full_result: dict) -> dict:
         
     Returns:
         dict: A dictionary with criteria_results containing only rating and evidence_list,
-              along with the overall eligibility_rating.
+              along with the overall eligibility_rating (and reanalysis details, if any).
     """
-    filtered_results = {}
-    for criterion, details in full_result.get("criteria_results", {}).items():
-        if isinstance(details, dict):
-            filtered_results[criterion] = {
-                "rating": details.get("rating"),
-                "evidence_list": details.get("evidence_list")
-            }
-        else:
-            filtered_results[criterion] = details
-
-    return {
-        "criteria_results": filtered_results,
+    # Build the filtered view directly, referencing the evidence lists rather than copying the result.
+    criteria_results = full_result.get("criteria_results", {})
+    filtered = {
+        "criteria_results": {
+            criterion: _filter_criterion(details) if isinstance(details, dict) else details
+            for criterion, details in criteria_results.items()
+        },
         "eligibility_rating": full_result.get("eligibility_rating")
     }
+    if "reanalysis" in full_result:
+        filtered["reanalysis"] = full_result["reanalysis"]
+    return filtered
 
 
 @app.post("/analyze_cv")
-async def analyze_cv_endpoint(cv: UploadFile = File(...), verbose: bool = False):
+async def analyze_cv_endpoint(
+    cv: UploadFile = File(...),
+    verbose: bool = False,
+    pretty: bool = False,
+    accept: str = Header(default=None),
+):
     """
     Endpoint to analyze a CV file for O1-A visa eligibility.
-    Times out after 60 seconds if processing takes too long.
+    Times out after settings.analysis_timeout seconds (60 by default), counting any time spent
+    waiting for admission; requests that cannot finish in time are rejected early with 503 and Retry-After.
     If verbose is False, chain-of-thought reasoning will be removed from the output.
+    The response is compact JSON by default; pretty=true indents it, and the Accept header
+    can request MessagePack (application/msgpack) when msgpack is installed.
     """
+    deadline_at = time.monotonic() + settings.analysis_timeout
     try:
-        full_result = await asyncio.wait_for(process_cv_and_analysis(cv), timeout=60)
+        full_result = await asyncio.wait_for(process_cv_and_analysis(cv, verbose, deadline_at),
+                                             timeout=settings.analysis_timeout)
     except asyncio.TimeoutError:
         raise HTTPException(status_code=504, detail="Processing timed out.")
     
@@ -98,10 +189,26 @@ async def analyze_cv_endpoint(cv: UploadFile = File(...), verbose: bool = False)
         final_output = filter_analysis_results(full_result)
     else:
         final_output = full_result
-    
-    # Slightly unnecessary, but useful for parsing by human eye for this exercise
-    pretty_json = json.dumps(final_output, indent=4)
-    return Response(content=pretty_json, media_type="application/json")
+
+    media_type = negotiate_media_type(accept)
+    content = encode_payload(final_output, media_type=media_type, pretty=pretty)
+    return Response(content=content, media_type=media_type)
+
+@app.get("/metrics/executors")
+async def executor_metrics_endpoint():
+    """
+    Report saturation metrics for the extraction, cleaning and LLM worker pools.
+    """
+    return pool_metrics()
+
+@app.get("/metrics/admission")
+async def admission_metrics_endpoint():
+    """
+    Report admission control occupancy and shed request counts for this worker process.
+    """
+    if admission is None:
+        return {"enabled": False}
+    return {"enabled": True, **admission.metrics()}
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
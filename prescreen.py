@@ -0,0 +1,215 @@
+# prescreen.py
+import argparse
+import json
+import re
+from functools import lru_cache
+
+# A deterministic keyword pre-screen that runs before the LLM. Each criterion in the visa JSON
+# carries a "keywords" list; a trailing "*" on a term matches any word suffix (e.g. "award*"
+# matches "awards" and "awarded"). All terms are compiled into one alternation so the CV is
+# scanned in a single pass. A criterion with zero hits can be given a synthetic low rating
+# without calling the LLM; criteria without a keyword list are never pre-screened.
+
+SUPER_CRITERIA_KEY = "super_criteria"
+
+# Characters of context kept on either side of a hit when building prompt highlights.
+SNIPPET_WINDOW = 80
+MAX_SNIPPETS = 8
+
+
+def _term_pattern(term: str) -> str:
+    """
+    Convert a keyword into a regex fragment. Whitespace matches any run of whitespace,
+    and a trailing "*" allows a word suffix. Word-boundary guards apply only at edges that
+    are word characters, so symbol terms such as "$" still match "$250,000".
+    """
+    prefix_match = term.endswith("*")
+    term = term.rstrip("*").strip()
+    fragment = r"\s+".join(re.escape(word) for word in term.split())
+    if prefix_match:
+        fragment += r"\w*"
+    if re.match(r"\w", term):
+        fragment = r"(?<!\w)" + fragment
+    if prefix_match or re.search(r"\w$", term):
+        fragment += r"(?!\w)"
+    return fragment
+
+
+@lru_cache(maxsize=8)
+def _compile(term_items: tuple) -> tuple:
+    """
+    Compile (criterion, terms) pairs into a single regex with one named group per term.
+
+    Returns the compiled pattern and a mapping of group name to the criteria that use the term.
+    """
+    criteria_by_term = {}
+    for criterion, terms in term_items:
+        for term in terms:
+            criteria_by_term.setdefault(term.lower(), []).append(criterion)
+
+    # Longer terms first so "best paper" wins over "paper*" at the same position.
+    ordered_terms = sorted(criteria_by_term, key=lambda t: len(t.rstrip("*")), reverse=True)
+    group_criteria = {}
+    alternatives = []
+    for idx, term in enumerate(ordered_terms):
+        group_name = f"t{idx}"
+        group_criteria[group_name] = criteria_by_term[term]
+        alternatives.append(f"(?P<{group_name}>{_term_pattern(term)})")
+
+    pattern = re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+    return pattern, group_criteria
+
+
+class Prescreener:
+    """
+    Multi-pattern matcher built from per-criterion term dictionaries.
+    """
+
+    def __init__(self, term_map: dict):
+        self.criteria = tuple(term_map)
+        self._pattern, self._group_criteria = _compile(
+            tuple((criterion, tuple(terms)) for criterion, terms in term_map.items())
+        )
+
+    def scan(self, cv_text: str) -> dict:
+        """
+        Scan the CV once and return a mapping of criterion name to a list of (start, end) hit spans.
+        Every screened criterion is present in the result, with an empty list when nothing matched.
+        """
+        hits = {criterion: [] for criterion in self.criteria}
+        if self._pattern is None:
+            return hits
+        for match in self._pattern.finditer(cv_text):
+            for criterion in self._group_criteria[match.lastgroup]:
+                hits[criterion].append(match.span())
+        return hits
+
+    @staticmethod
+    def snippets(cv_text: str, spans: list, window: int = SNIPPET_WINDOW, max_snippets: int = MAX_SNIPPETS) -> list:
+        """
+        Return up to max_snippets excerpts around the hit spans, with each hit wrapped in [[ ]].
+        Overlapping windows are merged into a single excerpt.
+        """
+        snippets = []
+        idx = 0
+        while idx < len(spans) and len(snippets) < max_snippets:
+            start = max(0, spans[idx][0] - window)
+            end = min(len(cv_text), spans[idx][1] + window)
+            group = [spans[idx]]
+            idx += 1
+            # Merge following hits that fall inside the current window.
+            while idx < len(spans) and spans[idx][0] <= end:
+                group.append(spans[idx])
+                end = min(len(cv_text), spans[idx][1] + window)
+                idx += 1
+
+            pieces = []
+            cursor = start
+            for hit_start, hit_end in group:
+                if hit_start < cursor:
+                    continue
+                pieces.append(cv_text[cursor:hit_start])
+                pieces.append(f"[[{cv_text[hit_start:hit_end]}]]")
+                cursor = hit_end
+            pieces.append(cv_text[cursor:end])
+            snippets.append(" ".join("".join(pieces).split()))
+        return snippets
+
+
+def build_prescreener(visa_info: dict, super_awards: list = None) -> Prescreener:
+    """
+    Build a Prescreener from the visa JSON. Criteria contribute their "keywords" lists and,
+    if super_awards is given, the super-criteria is screened against the award names.
+    """
+    term_map = {}
+    for criterion in visa_info.get("criteria", []):
+        keywords = criterion.get("keywords")
+        if keywords:
+            term_map[criterion["name"]] = keywords
+    if super_awards and visa_info.get("super_criteria"):
+        term_map[SUPER_CRITERIA_KEY] = super_awards
+    return Prescreener(term_map)
+
+
+def synthetic_low_result() -> dict:
+    """
+    Result used in place of an LLM call for a criterion with no keyword hits.
+    """
+    return {
+        "rating": 1,
+        "chain_of_thought": "Pre-screen found no terms associated with this criterion in the resume; LLM evaluation was skipped.",
+        "evidence_list": [],
+        "prescreened": True
+    }
+
+
+def prescreen_report(samples, prescreener: Prescreener, threshold: int) -> dict:
+    """
+    Compare pre-screen decisions against stored LLM results.
+
+    Args:
+        samples: Iterable of (cv_text, criteria_results) pairs, where criteria_results is the
+                 "criteria_results" mapping from a stored perform_analysis result.
+        prescreener: The Prescreener under evaluation.
+        threshold: LLM rating at or above which a criterion counts as positive.
+
+    Returns:
+        dict: Per-criterion counts plus precision (hits that the LLM rated positive) and
+              recall (LLM positives that the pre-screen would have kept). A recall below 1.0
+              means the pre-screen would have skipped a criterion the LLM rated positive.
+    """
+    counts = {criterion: {"tp": 0, "fp": 0, "fn": 0, "tn": 0} for criterion in prescreener.criteria}
+    for cv_text, criteria_results in samples:
+        hits = prescreener.scan(cv_text)
+        for criterion, spans in hits.items():
+            result = criteria_results.get(criterion)
+            if not isinstance(result, dict) or not isinstance(result.get("rating"), int) or result.get("prescreened"):
+                continue
+            positive = result["rating"] >= threshold
+            if spans:
+                counts[criterion]["tp" if positive else "fp"] += 1
+            else:
+                counts[criterion]["fn" if positive else "tn"] += 1
+
+    report = {}
+    for criterion, c in counts.items():
+        report[criterion] = dict(
+            c,
+            precision=c["tp"] / (c["tp"] + c["fp"]) if c["tp"] + c["fp"] else None,
+            recall=c["tp"] / (c["tp"] + c["fn"]) if c["tp"] + c["fn"] else None,
+            skip_rate=(c["fn"] + c["tn"]) / sum(c.values()) if sum(c.values()) else None
+        )
+    return report
+
+
+def main():
+    """
+    Print a precision/recall report for a JSONL file of stored results, one object per line
+    with "cv_text" and "criteria_results" keys.
+    """
+    from analysis import SUPER_AWARDS, POSITIVE_RATING_THRESHOLD
+    from data_loader import load_visa_data
+
+    parser = argparse.ArgumentParser(description="Evaluate the keyword pre-screen against stored LLM results.")
+    parser.add_argument("samples", help="JSONL file with cv_text and criteria_results per line.")
+    parser.add_argument("--threshold", type=int, default=POSITIVE_RATING_THRESHOLD)
+    args = parser.parse_args()
+
+    prescreener = build_prescreener(load_visa_data(), SUPER_AWARDS)
+    samples = []
+    with open(args.samples, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                samples.append((row["cv_text"], row["criteria_results"]))
+    report = prescreen_report(samples, prescreener, args.threshold)
+
+    print(f"{'criterion':<24}{'tp':>5}{'fp':>5}{'fn':>5}{'tn':>5}{'precision':>11}{'recall':>8}{'skip':>7}")
+    for criterion, row in report.items():
+        fmt = lambda v: "-" if v is None else f"{v:.2f}"
+        print(f"{criterion:<24}{row['tp']:>5}{row['fp']:>5}{row['fn']:>5}{row['tn']:>5}"
+              f"{fmt(row['precision']):>11}{fmt(row['recall']):>8}{fmt(row['skip_rate']):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# rescore.py
+"""
+Re-score stored analyses with new eligibility thresholds, without any LLM calls.
+
+Ratings are first exported from the history database into a compact columnar extract
+(an .npz file with one int8 rating matrix), which later runs load in milliseconds and
+score with vectorized aggregation.
+
+By default only analyses produced by the current model configuration against the current
+criteria data are re-scored, since ratings from other models or criteria are not comparable.
+Pass --model/--fingerprint to pick another combination, or --all for every stored analysis.
+
+Usage:
+    python rescore.py --threshold 5 --high-count 6 --medium-count 3 --super-threshold 8
+    python rescore.py --model gpt-4o
+    python rescore.py --all
+
+Each combination has its own extract, rebuilt whenever the database has changed since it was written.
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+
+import numpy as np
+
+from history_store import SCHEMA
+from prescreen import SUPER_CRITERIA_KEY
+
+ELIGIBILITY_LABELS = np.array(["low", "medium", "high"])
+MISSING_RATING = 0
+
+
+def extract_ratings(db_path: str, model: str = None, fingerprint: str = None) -> dict:
+    """
+    Build a columnar extract of the stored ratings.
+
+    Returns a dict of numpy arrays:
+      - "analysis_ids" (n,): analysis ids in ascending order.
+      - "criteria" (k,): standard criterion names, one per rating column.
+      - "ratings" (n, k) int8: ratings, with MISSING_RATING for errors or absent criteria.
+      - "super_ratings" (n,) int8: super-criteria ratings, MISSING_RATING when absent.
+      - "stored_eligibility" (n,) int8: index into ELIGIBILITY_LABELS of the stored rating (-1 if unknown).
+    """
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    where, params = [], []
+    if model:
+        where.append("a.model = ?")
+        params.append(model)
+    if fingerprint:
+        where.append("a.criteria_fingerprint = ?")
+        params.append(fingerprint)
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+    analyses = conn.execute(f"SELECT a.id, a.eligibility_rating FROM analyses a {where_sql} ORDER BY a.id", params).fetchall()
+    criteria = [row[0] for row in conn.execute(
+        f"SELECT DISTINCT r.criterion FROM criterion_results r JOIN analyses a ON a.id = r.analysis_id {where_sql} ORDER BY r.criterion",
+        params
+    )]
+    standard = [name for name in criteria if name != SUPER_CRITERIA_KEY]
+    columns = {name: idx for idx, name in enumerate(standard)}
+    columns[SUPER_CRITERIA_KEY] = len(standard)
+
+    analysis_ids = np.fromiter((row[0] for row in analyses), dtype=np.int64, count=len(analyses))
+    label_index = {label: idx for idx, label in enumerate(ELIGIBILITY_LABELS)}
+    stored = np.fromiter((label_index.get(row[1], -1) for row in analyses), dtype=np.int8, count=len(analyses))
+
+    cursor = conn.execute(
+        f"SELECT r.analysis_id, r.criterion, r.rating FROM criterion_results r "
+        f"JOIN analyses a ON a.id = r.analysis_id {where_sql}",
+        params
+    )
+    ids, cols, values = [], [], []
+    while True:
+        rows = cursor.fetchmany(100_000)
+        if not rows:
+            break
+        for analysis_id, criterion, rating in rows:
+            ids.append(analysis_id)
+            cols.append(columns[criterion])
+            values.append(MISSING_RATING if rating is None else rating)
+    conn.close()
+
+    matrix = np.full((len(analysis_ids), len(standard) + 1), MISSING_RATING, dtype=np.int8)
+    if ids:
+        rows_idx = np.searchsorted(analysis_ids, np.asarray(ids, dtype=np.int64))
+        matrix[rows_idx, np.asarray(cols)] = np.asarray(values, dtype=np.int8)
+
+    return {
+        "analysis_ids": analysis_ids,
+        "criteria": np.array(standard),
+        "ratings": matrix[:, :-1],
+        "super_ratings": matrix[:, -1],
+        "stored_eligibility": stored
+    }
+
+
+def score_ratings(ratings: np.ndarray, super_ratings: np.ndarray, threshold: int = 6, high_count: int = 6,
+                  medium_count: int = 3, super_threshold: int = 9) -> np.ndarray:
+    """
+    Vectorized equivalent of analysis.score_eligibility plus the super-criteria rule.
+
+    Returns an int8 array of indices into ELIGIBILITY_LABELS (0 low, 1 medium, 2 high).
+    """
+    positive = (ratings >= threshold).sum(axis=1)
+    scores = np.where(positive >= high_count, 2, np.where(positive >= medium_count, 1, 0)).astype(np.int8)
+    scores[super_ratings >= super_threshold] = 2
+    return scores
+
+
+def extract_is_stale(db_path: str, extract_path: str) -> bool:
+    """
+    Return True when the extract is missing or older than the database or its WAL file
+    (recent writes may only be in the WAL until the next checkpoint).
+    """
+    if not os.path.exists(extract_path):
+        return True
+    extract_mtime = os.path.getmtime(extract_path)
+    for path in (db_path, f"{db_path}-wal"):
+        if os.path.exists(path) and os.path.getmtime(path) > extract_mtime:
+            return True
+    return False
+
+
+def default_extract_path(db_path: str, model: str = None, fingerprint: str = None) -> str:
+    """
+    Return the extract path for one (model, fingerprint) filter, or for all analyses when both are None.
+    """
+    if model is None and fingerprint is None:
+        return f"{db_path}.ratings.npz"
+    tag = hashlib.sha256(f"{model or ''}\0{fingerprint or ''}".encode("utf-8")).hexdigest()[:16]
+    return f"{db_path}.{tag}.ratings.npz"
+
+
+def load_extract(path: str) -> dict:
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+
+def main():
+    from analysis import POSITIVE_RATING_THRESHOLD, SUPER_CRITERIA_THRESHOLD, analysis_model_key
+    from config import settings
+    from data_loader import load_visa_data
+    from history_store import criteria_fingerprint
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=settings.history_db_path, help="History database (default from config.yaml).")
+    parser.add_argument("--extract", default=None, help="Columnar extract path (default: one per filter next to the db).")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Rebuild the extract even if it is newer than the database.")
+    parser.add_argument("--model", help="Only include analyses produced by this model key (default: the configured one).")
+    parser.add_argument("--fingerprint", help="Only include analyses for this criteria fingerprint (default: the current criteria data).")
+    parser.add_argument("--all", action="store_true",
+                        help="Include every stored analysis, whatever model and criteria produced it.")
+    parser.add_argument("--threshold", type=int, default=POSITIVE_RATING_THRESHOLD)
+    parser.add_argument("--high-count", type=int, default=6)
+    parser.add_argument("--medium-count", type=int, default=3)
+    parser.add_argument("--super-threshold", type=int, default=SUPER_CRITERIA_THRESHOLD)
+    args = parser.parse_args()
+
+    if not args.db:
+        parser.error("No history database configured; pass --db or set history_db_path in config.yaml.")
+    if args.all:
+        if args.model or args.fingerprint:
+            parser.error("--all cannot be combined with --model or --fingerprint.")
+        model, fingerprint = None, None
+    else:
+        model = args.model or analysis_model_key()
+        fingerprint = args.fingerprint or criteria_fingerprint(load_visa_data())
+    extract_path = args.extract or default_extract_path(args.db, model, fingerprint)
+    if args.refresh or extract_is_stale(args.db, extract_path):
+        extract = extract_ratings(args.db, model, fingerprint)
+        np.savez(extract_path, **extract)
+    else:
+        extract = load_extract(extract_path)
+
+    scores = score_ratings(extract["ratings"], extract["super_ratings"], args.threshold,
+                           args.high_count, args.medium_count, args.super_threshold)
+    stored = extract["stored_eligibility"]
+    scope = "all models and criteria" if args.all else f"model {model}, criteria {fingerprint[:12]}"
+    print(f"Re-scored {len(scores)} analyses ({scope}) over criteria: {', '.join(extract['criteria'])}")
+    print(f"{'stored/new':<14}" + "".join(f"{label:>9}" for label in ELIGIBILITY_LABELS))
+    for old_idx, old_label in enumerate(ELIGIBILITY_LABELS):
+        counts = np.bincount(scores[stored == old_idx], minlength=len(ELIGIBILITY_LABELS))
+        print(f"{old_label:<14}" + "".join(f"{count:>9}" for count in counts))
+    print(f"Changed: {int((scores != stored).sum())}")
+
+
+if __name__ == "__main__":
+    main()
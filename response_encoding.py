@@ -0,0 +1,78 @@
+# response_encoding.py
+import json
+
+# orjson and msgpack are pinned in requirements.txt. The import guards only keep the service
+# usable (standard library JSON, no MessagePack) in environments installed without them.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on the environment
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def supported_media_types() -> list:
+    """
+    Return the media types the service can currently produce, in order of preference
+    when the client expresses no preference.
+    """
+    media_types = [JSON_MEDIA_TYPE]
+    if msgpack is not None:
+        media_types.extend(MSGPACK_MEDIA_TYPES)
+    return media_types
+
+
+def negotiate_media_type(accept_header: str) -> str:
+    """
+    Pick the response media type from the request's Accept header.
+
+    The highest q-value among the supported types wins; ties keep the client's order.
+    JSON is returned when the header is missing, only lists unsupported types, or uses a wildcard.
+    """
+    if not accept_header:
+        return JSON_MEDIA_TYPE
+
+    supported = supported_media_types()
+    best_type = None
+    best_quality = 0.0
+    for entry in accept_header.split(","):
+        parts = [part.strip() for part in entry.split(";")]
+        media_type = parts[0].lower()
+        quality = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if media_type in ("*/*", "application/*"):
+            media_type = JSON_MEDIA_TYPE
+        if media_type in supported and quality > best_quality:
+            best_type = media_type
+            best_quality = quality
+
+    return best_type or JSON_MEDIA_TYPE
+
+
+def encode_payload(payload: dict, media_type: str = JSON_MEDIA_TYPE, pretty: bool = False) -> bytes:
+    """
+    Serialize the payload for the negotiated media type.
+
+    JSON output is compact unless pretty is requested, in which case it is indented for reading by eye.
+    """
+    if media_type in MSGPACK_MEDIA_TYPES:
+        if msgpack is None:
+            raise ValueError(f"Media type {media_type} is not supported without msgpack installed.")
+        return msgpack.packb(payload, use_bin_type=True)
+
+    if pretty:
+        return json.dumps(payload, indent=4).encode("utf-8")
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
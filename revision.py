@@ -0,0 +1,209 @@
+# revision.py
+import hashlib
+import logging
+import re
+
+from prescreen import build_prescreener, SUPER_CRITERIA_KEY
+
+logger = logging.getLogger(__name__)
+
+# Incremental re-analysis of revised CVs. A CV is split into sections at heading lines, and
+# each section is stored with a digest alongside the analysis history. A new upload that
+# shares most section digests with a stored analysis is treated as a revision of it. Only
+# criteria whose keywords occur in the added or removed lines, or whose evidence the changed
+# section's heading names (e.g. publications for Scholarly Articles), are re-evaluated, and
+# the stored results are reused for the rest. A changed line that matches no keyword outside
+# such a section could be evidence for anything, so it re-evaluates every criterion.
+
+KNOWN_HEADINGS = {
+    "summary", "profile", "objective", "experience", "professional experience", "work experience",
+    "employment", "education", "publications", "selected publications", "patents", "awards",
+    "honors", "honours", "awards and honors", "skills", "projects", "research", "teaching",
+    "service", "professional service", "memberships", "affiliations", "press", "media",
+    "talks", "presentations", "invited talks", "activities", "certifications", "references",
+}
+
+# Criteria whose evidence a section usually holds, by normalized heading.
+HEADING_CRITERIA = {
+    "publications": ("Scholarly Articles",),
+    "selected publications": ("Scholarly Articles",),
+    "research": ("Scholarly Articles", "Original Contribution"),
+    "patents": ("Original Contribution",),
+    "awards": ("Awards", SUPER_CRITERIA_KEY),
+    "honors": ("Awards", SUPER_CRITERIA_KEY),
+    "honours": ("Awards", SUPER_CRITERIA_KEY),
+    "awards and honors": ("Awards", SUPER_CRITERIA_KEY),
+    "press": ("Press",),
+    "media": ("Press",),
+    "memberships": ("Membership",),
+    "affiliations": ("Membership",),
+    "service": ("Judging",),
+    "professional service": ("Judging",),
+    "experience": ("Critical Employment", "High Remuneration"),
+    "professional experience": ("Critical Employment", "High Remuneration"),
+    "work experience": ("Critical Employment", "High Remuneration"),
+    "employment": ("Critical Employment", "High Remuneration"),
+}
+
+MAX_HEADING_WORDS = 5
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def is_heading(line: str) -> bool:
+    """
+    Heuristically decide whether a line is a section heading: a short line that is a known
+    heading, ends with a colon, or is written in capitals.
+    """
+    stripped = line.strip()
+    if not stripped or len(stripped.split()) > MAX_HEADING_WORDS:
+        return False
+    name = _normalize(stripped).rstrip(":").strip()
+    if name in KNOWN_HEADINGS:
+        return True
+    if stripped.endswith(":"):
+        return True
+    letters = re.sub(r"[^A-Za-z]", "", stripped)
+    return len(letters) >= 4 and letters.isupper()
+
+
+def split_sections(cv_text: str) -> list:
+    """
+    Split a cleaned CV into sections at heading lines.
+
+    Returns a list of dicts with "heading" (normalized, "" for text before the first heading),
+    "digest" (SHA-256 of the normalized section text) and "text".
+    """
+    sections = []
+    heading, lines = "", []
+
+    def _close():
+        text = "\n".join(lines).strip()
+        if text or heading:
+            digest = hashlib.sha256(_normalize(f"{heading}\n{text}").encode("utf-8")).hexdigest()
+            sections.append({"heading": heading, "digest": digest, "text": text})
+
+    for line in cv_text.splitlines():
+        if is_heading(line):
+            _close()
+            heading, lines = _normalize(line).rstrip(":").strip(), []
+        else:
+            lines.append(line)
+    _close()
+    return sections
+
+
+def changed_sections(old_sections: list, new_sections: list) -> dict:
+    """
+    Return heading -> normalized lines added or removed under it, for the changed headings.
+
+    Sections are matched by heading; unchanged sections (same digest) contribute nothing, and
+    sections present on only one side contribute all of their lines plus the heading itself.
+    """
+    old_by_heading = {}
+    for section in old_sections:
+        old_by_heading.setdefault(section["heading"], []).append(section)
+    new_by_heading = {}
+    for section in new_sections:
+        new_by_heading.setdefault(section["heading"], []).append(section)
+
+    def _lines(sections: list) -> set:
+        return {_normalize(line) for section in sections for line in section["text"].splitlines() if line.strip()}
+
+    diff = {}
+    for heading in sorted(set(old_by_heading) | set(new_by_heading)):
+        old = old_by_heading.get(heading, [])
+        new = new_by_heading.get(heading, [])
+        if {s["digest"] for s in old} == {s["digest"] for s in new}:
+            continue
+        lines = sorted(_lines(old) ^ _lines(new))
+        # A renamed, added or removed heading is itself a change.
+        if not old or not new:
+            lines.append(heading)
+        diff[heading] = lines
+    return diff
+
+
+def changed_lines(old_sections: list, new_sections: list) -> list:
+    """
+    Return the normalized lines added or removed between two section lists (see changed_sections).
+    """
+    return [line for lines in changed_sections(old_sections, new_sections).values() for line in lines]
+
+
+def affected_criteria(diff: dict, names: list, prescreener) -> set:
+    """
+    Return the criteria a set of changed sections (changed_sections output) may affect: those
+    whose keywords occur in a changed line, those named by a changed section's heading, and
+    criteria without keywords (which cannot be screened). A changed line with no keyword hit
+    outside a mapped section re-evaluates every criterion.
+    """
+    if not diff:
+        return set()
+    affected = {name for name in names if name not in prescreener.criteria}
+    for heading, lines in diff.items():
+        mapped = set(HEADING_CRITERIA.get(heading, ())) & set(names)
+        affected |= mapped
+        for line in lines:
+            hit = {name for name, spans in prescreener.scan(line).items() if spans}
+            if not hit and not mapped:
+                return set(names)
+            affected |= hit
+    return affected
+
+
+def plan_reanalysis(sections: list, visa_info: dict, history, fingerprint: str, model: str,
+                    min_overlap: float, super_awards: list = None, verbose: bool = True) -> dict:
+    """
+    Look for a stored analysis the CV (given as split_sections output) is a revision of, and
+    decide which criteria to re-evaluate (see affected_criteria). Stored results from the
+    pre-screen are never reused, and for a verbose request neither are results that were
+    produced without chain-of-thought (brief).
+
+    Returns None when no sufficiently similar analysis exists. Otherwise returns a dict with:
+      - "revision_of": CV digest of the earlier analysis.
+      - "cached_results": criterion name -> stored result, for criteria that can be reused.
+      - "recomputed_criteria": names of the criteria that must be re-evaluated.
+      - "brief_criteria": names of the reused criteria whose stored results are brief.
+    """
+    candidate = history.find_revision_candidate([s["digest"] for s in sections], fingerprint, model)
+    if candidate is None:
+        return None
+
+    shared = len({s["digest"] for s in sections} & {s["digest"] for s in candidate["sections"]})
+    overlap = shared / max(len(sections), len(candidate["sections"]), 1)
+    if overlap < min_overlap:
+        logger.info(f"Closest stored CV shares {overlap:.0%} of sections; running a full analysis")
+        return None
+
+    names = [crit["name"] for crit in visa_info.get("criteria", [])]
+    if visa_info.get("super_criteria"):
+        names.append(SUPER_CRITERIA_KEY)
+
+    prescreener = build_prescreener(visa_info, super_awards)
+    affected = affected_criteria(changed_sections(candidate["sections"], sections), names, prescreener)
+    stored = candidate["criteria_results"]
+
+    cached_results, recomputed = {}, []
+    for name in names:
+        previous = stored.get(name)
+        unusable = not isinstance(previous, dict) or not isinstance(previous.get("rating"), int)
+        unusable = unusable or (verbose and name in candidate["brief_criteria"])
+        # Pre-screened results were never evaluated by the LLM; re-running them is free while the
+        # pre-screen is on and required once it is off.
+        unusable = unusable or bool(previous.get("prescreened"))
+        if unusable or name in affected:
+            recomputed.append(name)
+        else:
+            cached_results[name] = previous
+
+    logger.info(f"Revision of {candidate['cv_digest'][:12]} ({overlap:.0%} of sections shared); "
+                f"re-evaluating {len(recomputed)} of {len(names)} criteria")
+    return {
+        "revision_of": candidate["cv_digest"],
+        "cached_results": cached_results,
+        "recomputed_criteria": recomputed,
+        "brief_criteria": {name for name in cached_results if name in candidate["brief_criteria"]}
+    }
@@ -0,0 +1,144 @@
+# serve.py
+"""
+Pre-fork multi-worker server for main:app.
+
+The app module (criteria data, LangChain clients and all imports) is loaded once in the
+parent, which then binds the listening socket and forks the workers, so every worker starts
+warm and shares that memory copy-on-write. Each worker runs its own uvicorn server on the
+shared socket, and the workers share extraction and analysis results through the SQLite
+cache in shared_cache.py.
+
+On SIGTERM or SIGINT the parent forwards SIGTERM to every worker. A worker then stops
+accepting connections, lets in-flight analyses finish for up to the graceful shutdown
+timeout, and runs the app's shutdown (pools, history and cache). Workers that exit
+unexpectedly are replaced.
+
+Usage:
+    python serve.py --workers 4 --host 0.0.0.0 --port 8000
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+logger = logging.getLogger("serve")
+
+# A worker that exits sooner than this after starting is respawned only after a delay, so a
+# worker that crashes on startup does not fork in a tight loop.
+MIN_WORKER_UPTIME = 1.0
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """
+    Bind and listen on the socket shared by all workers.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, graceful_timeout: float):
+    """
+    Serve the app on an already bound socket until SIGTERM/SIGINT, draining in-flight requests.
+    """
+    config = uvicorn.Config(app, timeout_graceful_shutdown=graceful_timeout)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def run_prefork(app, host: str, port: int, workers: int, graceful_timeout: float):
+    """
+    Fork `workers` processes serving the app on one socket and supervise them until shutdown.
+    With a single worker, or where fork is unavailable, the app is served in this process.
+    """
+    sock = bind_socket(host, port)
+    if workers <= 1 or not hasattr(os, "fork"):
+        run_worker(app, sock, graceful_timeout)
+        return
+
+    children = {}
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            # Own process group, so a terminal Ctrl-C reaches only the parent, which then stops
+            # each worker exactly once (a second SIGINT would make uvicorn skip draining).
+            os.setpgid(0, 0)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                run_worker(app, sock, graceful_timeout)
+            except BaseException:
+                logger.exception(f"Worker {index} failed")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = (index, time.monotonic())
+
+    def stop(signum, frame):
+        nonlocal stopping
+        if not stopping:
+            logger.info(f"Received {signal.Signals(signum).name}; draining {len(children)} workers")
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info(f"Starting {workers} workers on {host}:{port} (parent pid {os.getpid()})")
+    for index in range(workers):
+        if not stopping:
+            spawn(index)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        if pid not in children:
+            continue
+        index, started_at = children.pop(pid)
+        if stopping:
+            continue
+        logger.warning(f"Worker {index} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}; restarting")
+        if time.monotonic() - started_at < MIN_WORKER_UPTIME:
+            time.sleep(MIN_WORKER_UPTIME)
+        if not stopping:
+            spawn(index)
+
+    sock.close()
+    logger.info("All workers stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default from config.yaml, else one per CPU).")
+    parser.add_argument("--graceful-timeout", type=float, default=None, help="Seconds a worker may drain in-flight requests.")
+    args = parser.parse_args()
+
+    # Importing main loads the criteria and the LLM clients once, before the workers fork.
+    import main as app_module
+    from config import settings
+
+    workers = args.workers or settings.serve_workers or os.cpu_count() or 1
+    graceful_timeout = args.graceful_timeout if args.graceful_timeout is not None else settings.graceful_shutdown_timeout
+    run_prefork(app_module.app, args.host, args.port, workers, graceful_timeout)
+
+
+if __name__ == "__main__":
+    main()
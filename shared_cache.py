@@ -0,0 +1,165 @@
+# shared_cache.py
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from config import settings
+from executors import get_pool, PoolSaturatedError
+
+logger = logging.getLogger(__name__)
+
+# Cache shared by every worker process on a host (see serve.py), backed by one SQLite file in
+# WAL mode so readers never block each other. Entries are JSON values in named namespaces
+# ("extraction" for cleaned CV text keyed by upload digest, "analysis" for finished analyses)
+# and expire after a TTL. Like HistoryStore, the connection is reopened after a fork, and
+# lookups run in the "history" stage pool rather than on the event loop.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_cache_entries_expires_at ON cache_entries (expires_at);
+"""
+
+# Expired entries are purged on every PURGE_INTERVAL-th write rather than on each one.
+PURGE_INTERVAL = 256
+
+
+def content_digest(data: bytes) -> str:
+    """
+    Return the SHA-256 hex digest of an uploaded file's bytes.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+class SharedCache:
+    """
+    SQLite-backed key-value cache with per-entry expiry, safe to share between processes.
+    """
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Workers write concurrently; wait for the lock instead of failing with "database is locked".
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, namespace: str, key: str):
+        """
+        Return the cached value for a key, or None when it is absent or expired.
+        """
+        with self._lock:
+            row = self.connection().execute(
+                "SELECT value FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, time.time())
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value):
+        """
+        Store a JSON-serializable value, replacing any existing entry for the key.
+        """
+        with self._lock:
+            conn = self.connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (namespace, key, json.dumps(value), time.time() + self.ttl)
+                )
+                self._writes += 1
+                if self._writes % PURGE_INTERVAL == 0:
+                    conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+
+    def metrics(self) -> dict:
+        """
+        Return this process's hit and miss counters.
+        """
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+
+
+_cache = None
+
+
+def get_cache() -> SharedCache:
+    """
+    Return the process-wide shared cache, or None when settings.shared_cache_path is unset.
+    """
+    global _cache
+    if _cache is None and settings.shared_cache_path:
+        _cache = SharedCache(settings.shared_cache_path, settings.shared_cache_ttl)
+        logger.info(f"Using shared cache at {settings.shared_cache_path}")
+    return _cache
+
+
+def close_cache():
+    """
+    Close the process-wide shared cache; it is reopened from settings on next use.
+    """
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+
+
+async def cache_get(namespace: str, key: str):
+    """
+    Look up a key in the shared cache off the event loop; returns None when caching is disabled.
+    Cache errors and a saturated pool are treated as misses.
+    """
+    cache = get_cache()
+    if cache is None:
+        return None
+    try:
+        return await get_pool("history").run(cache.get, namespace, key)
+    except (sqlite3.Error, PoolSaturatedError) as e:
+        logger.warning(f"Shared cache read failed: {e}")
+        return None
+
+
+async def cache_set(namespace: str, key: str, value):
+    """
+    Store a value in the shared cache off the event loop; a no-op when caching is disabled.
+    Failed or rejected writes are logged and skipped.
+    """
+    cache = get_cache()
+    if cache is None:
+        return
+    try:
+        await get_pool("history").run(cache.set, namespace, key, value)
+    except (sqlite3.Error, PoolSaturatedError) as e:
+        logger.warning(f"Shared cache write failed: {e}")
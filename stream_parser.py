@@ -0,0 +1,113 @@
+# stream_parser.py
+import json
+
+# Incremental parser for the top-level fields of a JSON object that arrives in chunks
+# (e.g. a streamed LLM completion). Each top-level value is decoded as soon as the
+# comma or closing brace after it arrives, so fields near the start of the object are
+# available long before the completion finishes. Text before the opening brace (such as a
+# markdown code fence) is ignored.
+
+
+class IncrementalJSONParser:
+    """
+    Parse the top-level key/value pairs of a streamed JSON object.
+
+    Attributes:
+        fields (dict): Top-level values decoded so far.
+        current_key (str): The key whose value is currently being received, if any.
+        started (bool): True once the opening brace of the object has been seen.
+        done (bool): True once the closing brace of the object has been seen.
+        failed (bool): True if the stream could not be parsed; callers should fall back
+                       to parsing the full text.
+    """
+
+    def __init__(self):
+        self.fields = {}
+        self.current_key = None
+        self.started = False
+        self.done = False
+        self.failed = False
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"
+        self._token_start = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> dict:
+        """
+        Consume the next chunk of text and return the fields completed by it.
+        """
+        completed = {}
+        if self.done or self.failed:
+            return completed
+
+        self._buffer += chunk
+        buf = self._buffer
+        i = self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._state == "key":
+                        self.current_key = self._decode(buf[self._token_start:i + 1])
+                        self._state = "colon"
+            elif self._state == "start":
+                if ch == "{":
+                    self.started = True
+                    self._state = "key"
+            elif self._state == "key":
+                if ch == '"':
+                    self._in_string = True
+                    self._token_start = i
+                elif ch == "}":
+                    self.done = True
+            elif self._state == "colon":
+                if ch == ":":
+                    self._state = "value"
+                    self._token_start = i + 1
+                    self._depth = 0
+            elif self._state == "value":
+                if ch == '"':
+                    self._in_string = True
+                elif ch in "[{":
+                    self._depth += 1
+                elif ch in "]}" and self._depth > 0:
+                    self._depth -= 1
+                elif ch in ",}" and self._depth == 0:
+                    value = self._decode(buf[self._token_start:i])
+                    if self.failed:
+                        break
+                    self.fields[self.current_key] = value
+                    completed[self.current_key] = value
+                    self.current_key = None
+                    if ch == "}":
+                        self.done = True
+                    else:
+                        self._state = "key"
+
+            i += 1
+            if self.done or self.failed:
+                break
+
+        self._pos = i
+        return completed
+
+    def has_fields(self, names) -> bool:
+        """
+        Return True when every named field has been decoded.
+        """
+        return all(name in self.fields for name in names)
+
+    def _decode(self, raw: str):
+        try:
+            return json.loads(raw)
+        except ValueError:
+            self.failed = True
+            return None
@@ -0,0 +1,15 @@
+# tests/conftest.py
+import pytest
+
+@pytest.fixture(autouse=True)
+def isolated_shared_cache(tmp_path, monkeypatch):
+    """
+    Point the shared cache at a per-test file so tests never see each other's cached results.
+    """
+    import shared_cache
+    from config import settings
+
+    monkeypatch.setattr(settings, "shared_cache_path", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(shared_cache, "_cache", None)
+    yield
+    shared_cache.close_cache()
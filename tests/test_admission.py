@@ -0,0 +1,173 @@
+# tests/test_admission.py
+import asyncio
+import httpx
+import pytest
+from admission import AdmissionController, AdmissionRejected
+
+@pytest.mark.asyncio
+async def test_slots_are_handed_to_waiters_in_order():
+    controller = AdmissionController(max_concurrent=1, queue_limit=2, deadline=60, initial_service_time=1.0)
+    order = []
+
+    async def analysis(name):
+        async with controller.slot():
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(analysis(name) for name in "abc"))
+    assert order == ["a", "b", "c"]
+    metrics = controller.metrics()
+    assert metrics["admitted"] == 3 and metrics["completed"] == 3
+    assert metrics["active"] == 0 and metrics["queued"] == 0
+    assert metrics["peak_queued"] == 2
+
+@pytest.mark.asyncio
+async def test_full_queue_is_shed_with_retry_after():
+    controller = AdmissionController(max_concurrent=1, queue_limit=1, deadline=60, initial_service_time=4.0)
+    await controller.acquire()
+    queued = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await controller.acquire()
+    assert exc_info.value.reason == "queue_full"
+    assert exc_info.value.retry_after == 8
+
+    controller.release(4.0)
+    await queued
+    assert controller.metrics()["shed"] == {"queue_full": 1, "deadline": 0, "queue_timeout": 0}
+
+@pytest.mark.asyncio
+async def test_requests_that_cannot_meet_the_deadline_are_shed():
+    controller = AdmissionController(max_concurrent=2, queue_limit=10, deadline=9, initial_service_time=4.0)
+    await controller.acquire()
+    await controller.acquire()
+    # A slot frees every ~2s and an analysis takes ~4s, so the first waiter finishes by ~6s
+    # and the second by ~8s; a third would finish by ~10s, past the deadline.
+    first = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    second = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await controller.acquire()
+    assert exc_info.value.reason == "deadline"
+    assert controller.metrics()["queued"] == 2
+    first.cancel()
+    second.cancel()
+    await asyncio.gather(first, second, return_exceptions=True)
+    assert controller.metrics()["queued"] == 0
+
+@pytest.mark.asyncio
+async def test_waiters_give_up_when_no_slot_frees_in_time():
+    controller = AdmissionController(max_concurrent=1, queue_limit=1, deadline=0.2, initial_service_time=0.1)
+    await controller.acquire()
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await controller.acquire()
+    assert exc_info.value.reason == "queue_timeout"
+    # The abandoned waiter must not receive the slot.
+    controller.release(0.1)
+    assert controller.metrics()["active"] == 0
+
+def test_service_time_estimate_tracks_completions():
+    controller = AdmissionController(max_concurrent=1, queue_limit=1, deadline=60, initial_service_time=10.0)
+    controller._active = 1
+    controller.release(20.0)
+    assert controller.service_time == pytest.approx(12.0)
+
+@pytest.mark.asyncio
+async def test_failed_analyses_do_not_lower_the_estimate():
+    controller = AdmissionController(max_concurrent=1, queue_limit=1, deadline=60, initial_service_time=10.0)
+    for _ in range(5):
+        with pytest.raises(ValueError):
+            async with controller.slot():
+                raise ValueError("empty PDF")
+    assert controller.service_time == 10.0
+    assert controller.metrics()["failed"] == 5
+    assert controller.metrics()["active"] == 0
+
+@pytest.mark.asyncio
+async def test_endpoint_returns_503_with_retry_after_when_shedding(monkeypatch):
+    import main
+
+    controller = AdmissionController(max_concurrent=1, queue_limit=0, deadline=60, initial_service_time=3.0)
+    monkeypatch.setattr(main, "admission", controller)
+    await controller.acquire()
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/analyze_cv", files={"cv": ("cv.txt", b"Won awards.")})
+        metrics = (await client.get("/metrics/admission")).json()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+    assert metrics["enabled"] is True
+    assert metrics["shed"]["queue_full"] == 1
+
+@pytest.mark.asyncio
+async def test_cache_hits_and_bad_uploads_bypass_admission(monkeypatch):
+    import main
+    from benchmarks.stub_llm import StubChatModel
+
+    stub = StubChatModel(latency=0.0, jitter=0.0, seed=0)
+    monkeypatch.setattr("analysis.llm", stub)
+    monkeypatch.setattr("analysis.get_llm", lambda model: stub)
+    monkeypatch.setattr(main, "history_store", None)
+    controller = AdmissionController(max_concurrent=1, queue_limit=0, deadline=60, initial_service_time=3.0)
+    monkeypatch.setattr(main, "admission", controller)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        files = {"cv": ("cv.txt", b"Published papers and won awards.")}
+        assert (await client.post("/analyze_cv", files=files)).status_code == 200
+        estimate = controller.service_time
+
+        # With the only slot taken, a cached analysis is still served and an empty PDF still gets its 400.
+        await controller.acquire()
+        assert (await client.post("/analyze_cv", files=files)).status_code == 200
+        assert (await client.post("/analyze_cv", files={"cv": ("cv.pdf", b"")})).status_code == 400
+
+    assert controller.metrics()["completed"] == 1
+    assert controller.metrics()["shed_total"] == 0
+    assert controller.service_time == estimate
+
+@pytest.mark.asyncio
+async def test_remaining_budget_governs_shedding_and_queue_timeout():
+    controller = AdmissionController(max_concurrent=1, queue_limit=4, deadline=60, initial_service_time=4.0)
+    await controller.acquire()
+    # Would fit the full deadline, but not the 7s the request has left.
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await controller.acquire(budget=7)
+    assert exc_info.value.reason == "deadline"
+    # A queued request gives up once its remaining budget could no longer fit one analysis.
+    controller.service_time = 0.1
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await controller.acquire(budget=0.25)
+    assert exc_info.value.reason == "queue_timeout"
+
+@pytest.mark.asyncio
+async def test_endpoint_admits_against_the_time_left_after_extraction(monkeypatch):
+    import main
+    from config import settings
+
+    class RecordingController(AdmissionController):
+        async def acquire(self, budget=None):
+            budgets.append(budget)
+            return await super().acquire(budget)
+
+    async def slow_text(cv):
+        await asyncio.sleep(0.2)
+        return "Won awards."
+
+    async def analysis(*args, **kwargs):
+        return {"criteria_results": {}, "eligibility_rating": "low"}
+
+    budgets = []
+    monkeypatch.setattr(main, "admission", RecordingController(max_concurrent=1, queue_limit=0, deadline=60))
+    monkeypatch.setattr(main, "process_text", slow_text)
+    monkeypatch.setattr(main, "perform_analysis", analysis)
+    monkeypatch.setattr(settings, "analysis_timeout", 5)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/analyze_cv", files={"cv": ("cv.txt", b"Won awards.")})
+    assert response.status_code == 200
+    assert len(budgets) == 1 and budgets[0] <= 4.8
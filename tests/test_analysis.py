@@ -17,7 +17,7 @@ async def test_evaluate_super_criteria(monkeypatch):
     }
     
     # Define a dummy query_llm function that always returns our dummy_response.
-    async def dummy_query_llm(prompt: str) -> dict:
+    async def dummy_query_llm(prompt: str, **kwargs) -> dict:
          return dummy_response
 
     # Use monkeypatch to override query_llm in the analysis module.
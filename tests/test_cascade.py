@@ -0,0 +1,89 @@
+# tests/test_cascade.py
+import json
+import pytest
+from types import SimpleNamespace
+from analysis import run_evaluation, escalation_reason, perform_analysis, POSITIVE_RATING_THRESHOLD, SUPER_CRITERIA_THRESHOLD
+from config import settings
+
+class StubLLM:
+    """
+    Stand-in for a LangChain chat client that returns a canned completion and counts calls.
+    """
+    def __init__(self, content: str):
+        self.content = content
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return SimpleNamespace(content=self.content)
+
+def completion(rating: int, confidence: int = 9) -> str:
+    return json.dumps({
+        "rating": rating,
+        "chain_of_thought": "Stub reasoning.",
+        "evidence_list": ["stub evidence"],
+        "confidence": confidence
+    })
+
+@pytest.fixture
+def cascade(monkeypatch):
+    """
+    Enable the cascade and route each model name to its own stub backend.
+    """
+    backends = {}
+    monkeypatch.setattr(settings, "cascade_enabled", True)
+    monkeypatch.setattr(settings, "cascade_borderline_band", 2)
+    monkeypatch.setattr(settings, "cascade_min_confidence", 7)
+    monkeypatch.setattr("analysis.get_llm", lambda model: backends[model])
+
+    def install(fast_content: str, primary_content: str = None):
+        backends[settings.cascade_model] = StubLLM(fast_content)
+        backends[settings.llm_model] = StubLLM(primary_content or completion(5))
+        return backends[settings.cascade_model], backends[settings.llm_model]
+
+    return install
+
+@pytest.mark.asyncio
+async def test_clear_fast_result_is_kept(cascade):
+    fast, primary = cascade(completion(1))
+    result = await run_evaluation("prompt", POSITIVE_RATING_THRESHOLD)
+    assert result["rating"] == 1
+    assert result["tier"] == "fast"
+    assert (fast.calls, primary.calls) == (1, 0)
+
+@pytest.mark.asyncio
+async def test_borderline_result_escalates(cascade):
+    fast, primary = cascade(completion(6), completion(5))
+    result = await run_evaluation("prompt", POSITIVE_RATING_THRESHOLD)
+    assert result["rating"] == 5
+    assert result["tier"] == "primary"
+    assert result["escalation_reason"] == "borderline"
+    assert (fast.calls, primary.calls) == (1, 1)
+
+@pytest.mark.asyncio
+async def test_parse_failure_escalates(cascade):
+    fast, primary = cascade("not json at all")
+    result = await run_evaluation("prompt", POSITIVE_RATING_THRESHOLD)
+    assert result["escalation_reason"] == "parse_failure"
+    assert primary.calls == 1
+
+def test_escalation_reason_uses_band_and_confidence(monkeypatch):
+    monkeypatch.setattr(settings, "cascade_borderline_band", 2)
+    monkeypatch.setattr(settings, "cascade_min_confidence", 7)
+    assert escalation_reason({"rating": 3, "confidence": 9}, POSITIVE_RATING_THRESHOLD) is None
+    assert escalation_reason({"rating": 4, "confidence": 9}, POSITIVE_RATING_THRESHOLD) == "borderline"
+    assert escalation_reason({"rating": 8, "confidence": 9}, POSITIVE_RATING_THRESHOLD) is None
+    assert escalation_reason({"rating": 8, "confidence": 3}, POSITIVE_RATING_THRESHOLD) == "low_confidence"
+    assert escalation_reason({"rating": 8, "confidence": 9}, SUPER_CRITERIA_THRESHOLD) == "borderline"
+    assert escalation_reason({"error": "Could not parse response"}, POSITIVE_RATING_THRESHOLD) == "parse_failure"
+
+@pytest.mark.asyncio
+async def test_perform_analysis_records_tier(cascade):
+    cascade(completion(1))
+    visa_info = {
+        "super_criteria": "Major internationally recognized award.",
+        "criteria": [{"name": "Awards", "full_text": "Awards criterion."}]
+    }
+    result = await perform_analysis("A resume.", visa_info)
+    assert result["criteria_results"]["Awards"]["tier"] == "fast"
+    assert result["eligibility_rating"] == "low"
@@ -0,0 +1,112 @@
+# tests/test_executors.py
+import asyncio
+import threading
+import pytest
+from executors import StagePool, PoolSaturatedError, get_pool, pool_metrics
+from data_cleanser import clean_text
+
+@pytest.mark.asyncio
+async def test_pool_rejects_when_saturated():
+    pool = StagePool("test", workers=1, queue_limit=1)
+    release = threading.Event()
+    running = [asyncio.create_task(pool.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(PoolSaturatedError):
+        await pool.run(len, "x")
+
+    metrics = pool.metrics()
+    assert metrics["in_flight"] == 2
+    assert metrics["queued"] == 1
+    assert metrics["saturation"] == 1.0
+    assert metrics["rejected"] == 1
+
+    release.set()
+    await asyncio.gather(*running)
+    assert pool.metrics()["completed"] == 2
+    assert pool.metrics()["in_flight"] == 0
+    pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_process_pool_runs_clean_text():
+    pool = StagePool("cleaning-test", workers=1, queue_limit=4, use_processes=True)
+    try:
+        result = await pool.run(clean_text, "Contact  me at a@b.com  today")
+    finally:
+        pool.shutdown()
+    assert result == "Contact me at today"
+    assert pool.metrics()["kind"] == "process"
+
+@pytest.mark.asyncio
+async def test_stage_pools_are_separate():
+    assert get_pool("llm") is not get_pool("extraction")
+    await get_pool("cleaning").run(clean_text, "text")
+    assert pool_metrics()["cleaning"]["completed"] >= 1
+
+@pytest.mark.asyncio
+async def test_timed_out_tasks_keep_their_slot_until_they_finish():
+    pool = StagePool("test", workers=1, queue_limit=1)
+    release = threading.Event()
+    for _ in range(2):
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.run(release.wait), timeout=0.05)
+
+    # The first task is still running in its thread; the queued one was cancelled before starting.
+    metrics = pool.metrics()
+    assert metrics["in_flight"] == 1
+    assert metrics["cancelled"] == 1
+
+    # The abandoned task still occupies the worker, so only one more task fits.
+    blocked = asyncio.create_task(pool.run(release.wait))
+    await asyncio.sleep(0.01)
+    with pytest.raises(PoolSaturatedError):
+        await pool.run(len, "x")
+
+    release.set()
+    await blocked
+    await asyncio.sleep(0.05)
+    assert pool.metrics()["in_flight"] == 0
+    assert pool.metrics()["completed"] == 2
+    pool.shutdown()
+
+def test_partial_executor_config_keeps_defaults():
+    from config import Settings, default_executors
+    settings = Settings(
+        visa_data_path="data/O1-A-visa.json", llm_api_endpoint="", llm_model="gpt-4o", openai_api_key="key",
+        executors={"extraction": {"workers": 8}}
+    )
+    assert settings.executors["extraction"].workers == 8
+    assert settings.executors["extraction"].queue_limit == 32
+    assert settings.executors["llm"].workers == 32
+    assert set(settings.executors) == set(default_executors())
+
+@pytest.mark.asyncio
+async def test_saturation_suggests_retry_after_from_mean_run_time():
+    pool = StagePool("test", workers=1, queue_limit=0)
+    await pool.run(len, "x")
+    pool.run_time_total = 2.5
+    release = threading.Event()
+    running = asyncio.create_task(pool.run(release.wait))
+    await asyncio.sleep(0.05)
+    with pytest.raises(PoolSaturatedError) as exc_info:
+        await pool.run(len, "x")
+    assert exc_info.value.retry_after == 3
+    release.set()
+    await running
+    pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_endpoint_returns_retry_after_when_a_pool_is_saturated(monkeypatch):
+    import httpx
+    import main
+
+    async def saturated(*args, **kwargs):
+        raise PoolSaturatedError("The llm pool is saturated.", retry_after=4)
+
+    monkeypatch.setattr(main, "perform_analysis", saturated)
+    monkeypatch.setattr(main, "admission", None)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/analyze_cv", files={"cv": ("cv.txt", b"Won awards.")})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "4"
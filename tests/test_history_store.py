@@ -0,0 +1,62 @@
+# tests/test_history_store.py
+import pytest
+from history_store import HistoryStore, cv_digest, criteria_fingerprint
+from analysis import perform_analysis, analysis_model_key
+
+RESULTS = {
+    "Awards": {"rating": 8, "chain_of_thought": "Strong awards.", "evidence_list": ["Best Paper Award"], "confidence": 9},
+    "Press": {"error": "Could not parse response", "raw_response": "oops"}
+}
+
+def test_record_and_load_round_trip(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    store.record("digest", "fingerprint", "gpt-4o", RESULTS, "low")
+    loaded = store.load("digest", "fingerprint", "gpt-4o")
+    assert loaded["eligibility_rating"] == "low"
+    assert loaded["criteria_results"]["Awards"] == {
+        "rating": 8, "chain_of_thought": "Strong awards.", "evidence_list": ["Best Paper Award"], "confidence": 9
+    }
+    assert loaded["criteria_results"]["Press"] == RESULTS["Press"]
+    assert loaded["brief_criteria"] == set()
+    assert store.load("digest", "fingerprint", "gpt-4o-mini") is None
+
+def test_record_replaces_same_key(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    first = store.record("digest", "fingerprint", "gpt-4o", RESULTS, "low")
+    second = store.record("digest", "fingerprint", "gpt-4o", {"Awards": {"rating": 2, "evidence_list": []}}, "low")
+    assert first == second
+    assert list(store.load("digest", "fingerprint", "gpt-4o")["criteria_results"]) == ["Awards"]
+
+@pytest.mark.asyncio
+async def test_perform_analysis_persists_super_result_below_threshold(tmp_path, monkeypatch):
+    async def dummy_query_llm(prompt: str, **kwargs) -> dict:
+        return {"rating": 4, "chain_of_thought": "Some evidence.", "evidence_list": []}
+
+    monkeypatch.setattr("analysis.query_llm", dummy_query_llm)
+    visa_info = {
+        "super_criteria": "Major internationally recognized award.",
+        "criteria": [{"name": "Awards", "full_text": "Awards criterion."}]
+    }
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    result = await perform_analysis("A resume.", visa_info, history=store)
+
+    assert "super_criteria" not in result["criteria_results"]
+    stored = store.load(cv_digest("A resume."), criteria_fingerprint(visa_info), analysis_model_key())
+    assert stored["criteria_results"]["super_criteria"]["rating"] == 4
+    assert stored["criteria_results"]["Awards"]["rating"] == 4
+
+def test_databases_without_result_json_are_migrated(tmp_path):
+    import sqlite3
+    path = str(tmp_path / "history.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        "CREATE TABLE criterion_results (analysis_id INTEGER NOT NULL, criterion TEXT NOT NULL, rating INTEGER, "
+        "confidence INTEGER, tier TEXT, chain_of_thought TEXT, evidence_list TEXT, error TEXT, "
+        "PRIMARY KEY (analysis_id, criterion));"
+    )
+    conn.close()
+    store = HistoryStore(path)
+    store.record("digest", "fingerprint", "gpt-4o", RESULTS, "low", brief_criteria={"Awards"})
+    loaded = store.load("digest", "fingerprint", "gpt-4o")
+    assert loaded["criteria_results"]["Awards"] == RESULTS["Awards"]
+    assert loaded["brief_criteria"] == {"Awards"}
@@ -0,0 +1,39 @@
+# tests/test_load_test.py
+import json
+import random
+import httpx
+import pytest
+from benchmarks.load_test import load_corpus, run_rate, summarize
+from benchmarks.stub_llm import StubChatModel
+
+def test_load_corpus_reads_manifest(tmp_path):
+    (tmp_path / "resume.txt").write_text("Led the team that won the Best Paper Award.")
+    manifest = tmp_path / "corpus.jsonl"
+    manifest.write_text(json.dumps({"path": "resume.txt", "verbose": True}) + "\n")
+    corpus = load_corpus(manifest=str(manifest))
+    assert corpus == [{"filename": "resume.txt", "content": b"Led the team that won the Best Paper Award.", "verbose": True}]
+
+def test_summarize_reports_errors_and_percentiles():
+    outcomes = [(200, 1.0), (200, 2.0), (504, 60.0), ("error:ReadTimeout", 90.0)]
+    row = summarize(outcomes, elapsed=10.0, rate=0.4)
+    assert row["ok"] == 2
+    assert row["throughput"] == 0.2
+    assert row["p50"] == 1.0
+    assert row["error_rate"] == 0.5
+
+@pytest.mark.asyncio
+async def test_run_rate_against_app_with_stub_llm(monkeypatch):
+    import main
+
+    stub = StubChatModel(latency=0.0, jitter=0.0, seed=0)
+    monkeypatch.setattr("analysis.llm", stub)
+    monkeypatch.setattr("analysis.get_llm", lambda model: stub)
+    monkeypatch.setattr(main, "history_store", None)
+
+    corpus = [{"filename": "resume.txt", "content": b"Published papers and won awards.", "verbose": False}]
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        row = await run_rate(client, corpus, rate=50.0, duration=0.2, timeout=30.0, rng=random.Random(0))
+
+    assert row["sent"] > 0
+    assert row["statuses"] == {200: row["sent"]}
@@ -0,0 +1,38 @@
+# tests/test_loop_monitor.py
+import asyncio
+import time
+import pytest
+from loop_monitor import EventLoopLagMonitor, percentile
+
+def blocking_helper():
+    # Synchronous work on the event loop that the monitor should catch.
+    time.sleep(0.3)
+
+@pytest.mark.asyncio
+async def test_monitor_samples_stack_of_blocking_call():
+    monitor = EventLoopLagMonitor(interval=0.01, threshold=0.1)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    blocking_helper()
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    report = monitor.report()
+    assert report["stalls"] == 1
+    assert report["lag_max"] >= 0.2
+    assert "blocking_helper" in report["stall_stacks"][0]["stack"]
+
+@pytest.mark.asyncio
+async def test_monitor_quiet_loop_has_no_stalls():
+    monitor = EventLoopLagMonitor(interval=0.01, threshold=0.1)
+    monitor.start()
+    await asyncio.sleep(0.1)
+    await monitor.stop()
+    assert monitor.report()["stalls"] == 0
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([], 50) is None
@@ -1,6 +1,6 @@
 # test_main.py
 from fastapi.testclient import TestClient
-from main import app
+from main import app, filter_analysis_results
 
 client = TestClient(app)
 
@@ -16,4 +16,17 @@ def test_analyze_cv_pdf_empty():
     # This test simulates an empty PDF file.
     response = client.post("/analyze_cv", files={"cv": ("empty.pdf", b"")})
     assert response.status_code == 400
-    assert "Uploaded PDF is empty" in response.json()["detail"]
\ No newline at end of file
+    assert "Uploaded PDF is empty" in response.json()["detail"]
+
+def test_filter_analysis_results_drops_chain_of_thought():
+    full_result = {
+        "criteria_results": {
+            "Awards": {"rating": 8, "chain_of_thought": "Long reasoning.", "evidence_list": ["Turing Award"]},
+            "Press": {"error": "Could not parse response"}
+        },
+        "eligibility_rating": "medium"
+    }
+    filtered = filter_analysis_results(full_result)
+    assert filtered["criteria_results"]["Awards"] == {"rating": 8, "evidence_list": ["Turing Award"]}
+    assert "chain_of_thought" not in filtered["criteria_results"]["Press"]
+    assert filtered["eligibility_rating"] == "medium"
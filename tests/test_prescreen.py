@@ -0,0 +1,86 @@
+# tests/test_prescreen.py
+import pytest
+from prescreen import Prescreener, build_prescreener, prescreen_report, SUPER_CRITERIA_KEY
+from analysis import perform_analysis, build_criterion_prompt, SUPER_AWARDS
+from config import settings
+from data_cleanser import clean_text
+
+VISA_INFO = {
+    "super_criteria": "Major internationally recognized award.",
+    "criteria": [
+        {"name": "Awards", "full_text": "Awards criterion.", "keywords": ["award*", "best paper"]},
+        {"name": "Judging", "full_text": "Judging criterion.", "keywords": ["judg*", "program committee"]},
+        {"name": "Press", "full_text": "Press criterion.", "keywords": ["interview*"]},
+    ]
+}
+
+CV_TEXT = "Received the Best Paper Award at ICML.\nServed on the program\ncommittee of NeurIPS."
+
+def test_scan_finds_hits_in_a_single_pass():
+    hits = build_prescreener(VISA_INFO, SUPER_AWARDS).scan(CV_TEXT)
+    assert len(hits["Awards"]) == 2
+    assert len(hits["Judging"]) == 1  # multi-word term spans a line break
+    assert hits["Press"] == []
+    assert hits[SUPER_CRITERIA_KEY] == []
+
+def test_prefix_terms_require_word_start():
+    prescreener = Prescreener({"Awards": ["award*"], "Critical Employment": ["led"]})
+    hits = prescreener.scan("Awarded twice; the ledger was balanced.")
+    assert len(hits["Awards"]) == 1
+    assert hits["Critical Employment"] == []
+
+def test_symbol_terms_match_amounts():
+    # CV text is scanned after clean_text, which drops non-ASCII symbols such as € and £.
+    prescreener = Prescreener({"High Remuneration": ["salary", "$"]})
+    hits = prescreener.scan(clean_text("Base pay of $250,000 (about €230k) plus a $40,000 bonus."))
+    assert [span[1] - span[0] for span in hits["High Remuneration"]] == [1, 1]
+
+def test_real_criteria_keywords_catch_pay_figures():
+    from data_loader import load_visa_data
+    hits = build_prescreener(load_visa_data(), SUPER_AWARDS).scan("Paid $250,000 per year as lead engineer.")
+    assert hits["High Remuneration"]
+
+def test_snippets_highlight_hits():
+    prescreener = Prescreener({"Awards": ["award*"]})
+    spans = prescreener.scan(CV_TEXT)["Awards"]
+    snippets = Prescreener.snippets(CV_TEXT, spans, window=10)
+    assert snippets == ["est Paper [[Award]] at ICML."]
+
+def test_prompt_includes_highlights():
+    prompt = build_criterion_prompt("criterion", "resume", "instructions", "comparable", highlights=["the [[Award]]"])
+    assert "<start_highlights>" in prompt
+    assert "- the [[Award]]" in prompt
+    assert "<start_highlights>" not in build_criterion_prompt("criterion", "resume", "instructions", "comparable")
+
+def test_prescreen_report_precision_recall():
+    prescreener = Prescreener({"Awards": ["award*"]})
+    samples = [
+        ("Won an award.", {"Awards": {"rating": 8}}),   # tp
+        ("Award nominee.", {"Awards": {"rating": 2}}),  # fp
+        ("Gold medalist.", {"Awards": {"rating": 7}}),  # fn
+        ("Software engineer.", {"Awards": {"rating": 1}}),  # tn
+    ]
+    report = prescreen_report(samples, prescreener, threshold=6)["Awards"]
+    assert (report["tp"], report["fp"], report["fn"], report["tn"]) == (1, 1, 1, 1)
+    assert report["precision"] == 0.5
+    assert report["recall"] == 0.5
+
+@pytest.mark.asyncio
+async def test_perform_analysis_skips_criteria_without_hits(monkeypatch):
+    prompts = []
+
+    async def dummy_query_llm(prompt: str, **kwargs) -> dict:
+        prompts.append(prompt)
+        return {"rating": 7, "chain_of_thought": "Evidence found.", "evidence_list": ["item"]}
+
+    monkeypatch.setattr("analysis.query_llm", dummy_query_llm)
+    monkeypatch.setattr(settings, "prescreen_enabled", True)
+
+    result = await perform_analysis(CV_TEXT, VISA_INFO)
+
+    # Only Awards and Judging reach the LLM; Press and the super-criteria are pre-screened out.
+    assert len(prompts) == 2
+    assert all("<start_highlights>" in prompt for prompt in prompts)
+    assert result["criteria_results"]["Press"]["rating"] == 1
+    assert result["criteria_results"]["Press"]["prescreened"] is True
+    assert result["criteria_results"]["Awards"]["rating"] == 7
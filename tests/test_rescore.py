@@ -0,0 +1,73 @@
+# tests/test_rescore.py
+import os
+import random
+import numpy as np
+from history_store import HistoryStore
+from rescore import extract_ratings, extract_is_stale, score_ratings, ELIGIBILITY_LABELS
+from analysis import score_eligibility
+
+CRITERIA = ["Awards", "Judging", "Membership", "Press", "Scholarly Articles", "Critical Employment", "High Remuneration"]
+
+def test_vectorized_scoring_matches_score_eligibility(tmp_path):
+    rng = random.Random(0)
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    expected = []
+    for idx in range(200):
+        results = {name: {"rating": rng.randint(1, 10), "evidence_list": []} for name in CRITERIA}
+        results["Press"] = {"error": "Could not parse response"} if idx % 7 == 0 else results["Press"]
+        super_rating = rng.randint(1, 10)
+        results["super_criteria"] = {"rating": super_rating, "evidence_list": []}
+        standard = [results[name] for name in CRITERIA]
+        rating = "high" if super_rating >= 9 else score_eligibility(standard)
+        expected.append(rating)
+        store.record(f"digest-{idx}", "fingerprint", "gpt-4o", results, rating)
+
+    extract = extract_ratings(store.path)
+    assert extract["ratings"].shape == (200, len(CRITERIA))
+    assert extract["ratings"].dtype == np.int8
+
+    scores = score_ratings(extract["ratings"], extract["super_ratings"])
+    assert list(ELIGIBILITY_LABELS[scores]) == expected
+    assert (scores == extract["stored_eligibility"]).all()
+
+def test_new_thresholds_change_scores():
+    ratings = np.array([[5, 5, 5, 1], [7, 7, 7, 7]], dtype=np.int8)
+    super_ratings = np.array([8, 1], dtype=np.int8)
+    assert list(score_ratings(ratings, super_ratings)) == [0, 1]
+    assert list(score_ratings(ratings, super_ratings, threshold=5, high_count=3, super_threshold=8)) == [2, 2]
+
+def test_extract_is_rebuilt_after_new_analyses(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    store.record("digest-1", "fingerprint", "gpt-4o", {"Awards": {"rating": 7, "evidence_list": []}}, "low")
+    extract_path = str(tmp_path / "history.sqlite3.ratings.npz")
+    assert extract_is_stale(store.path, extract_path)
+
+    np.savez(extract_path, **extract_ratings(store.path))
+    assert not extract_is_stale(store.path, extract_path)
+
+    store.record("digest-2", "fingerprint", "gpt-4o", {"Awards": {"rating": 3, "evidence_list": []}}, "low")
+    # Make the write strictly newer than the extract on filesystems with coarse timestamps.
+    later = os.path.getmtime(extract_path) + 1
+    os.utime(store.path + "-wal", (later, later))
+    assert extract_is_stale(store.path, extract_path)
+
+def test_cli_defaults_to_the_current_model_and_criteria(tmp_path, monkeypatch, capsys):
+    import sys
+    import rescore
+    from analysis import analysis_model_key
+    from data_loader import load_visa_data
+    from history_store import criteria_fingerprint
+
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    current = criteria_fingerprint(load_visa_data())
+    results = {"Awards": {"rating": 7, "evidence_list": []}}
+    store.record("digest-1", current, analysis_model_key(), results, "low")
+    store.record("digest-2", current, "other-model", results, "low")
+    store.record("digest-3", "old-criteria", analysis_model_key(), results, "low")
+
+    for argv, expected in (([], 1), (["--model", "other-model"], 1), (["--all"], 3)):
+        monkeypatch.setattr(sys, "argv", ["rescore.py", "--db", store.path, *argv])
+        rescore.main()
+        assert f"Re-scored {expected} analyses" in capsys.readouterr().out
+    # Each filter keeps its own extract, so the mixed one never stands in for the current one.
+    assert len(list(tmp_path.glob("*.ratings.npz"))) == 3
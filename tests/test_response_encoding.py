@@ -0,0 +1,36 @@
+# tests/test_response_encoding.py
+import json
+import msgpack
+from response_encoding import negotiate_media_type, encode_payload, JSON_MEDIA_TYPE
+
+PAYLOAD = {
+    "criteria_results": {"Awards": {"rating": 7, "evidence_list": ["Best Paper Award"]}},
+    "eligibility_rating": "medium"
+}
+
+def test_negotiate_defaults_to_json():
+    assert negotiate_media_type(None) == JSON_MEDIA_TYPE
+    assert negotiate_media_type("*/*") == JSON_MEDIA_TYPE
+    assert negotiate_media_type("text/html") == JSON_MEDIA_TYPE
+
+def test_negotiate_prefers_highest_quality():
+    accept = "application/json;q=0.5, application/msgpack;q=0.9"
+    assert negotiate_media_type(accept) == "application/msgpack"
+
+def test_encode_json_is_compact_by_default():
+    body = encode_payload(PAYLOAD)
+    assert b"\n" not in body
+    assert b": " not in body
+    assert json.loads(body) == PAYLOAD
+
+def test_encode_json_pretty():
+    body = encode_payload(PAYLOAD, pretty=True)
+    assert body.decode("utf-8") == json.dumps(PAYLOAD, indent=4)
+
+def test_encode_json_uses_orjson():
+    import response_encoding
+    assert response_encoding.orjson is not None
+
+def test_encode_msgpack_round_trip():
+    body = encode_payload(PAYLOAD, media_type="application/msgpack")
+    assert msgpack.unpackb(body, raw=False) == PAYLOAD
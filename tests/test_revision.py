@@ -0,0 +1,170 @@
+# tests/test_revision.py
+import pytest
+from revision import split_sections, changed_lines
+from history_store import HistoryStore
+from analysis import perform_analysis
+from config import settings
+
+CV_V1 = """Jane Doe
+Summary:
+Machine learning engineer building recommendation systems.
+EXPERIENCE
+Staff Engineer, Acme Corp
+Built the ranking platform used by all product teams.
+Publications
+Doe, J. Fast Ranking. Proceedings of KDD 2021.
+Education
+Ph.D. Computer Science"""
+
+CV_V2 = CV_V1.replace(
+    "Proceedings of KDD 2021.",
+    "Proceedings of KDD 2021.\nDoe, J. Faster Ranking. Journal of Machine Learning Research 2024."
+)
+
+VISA_INFO = {
+    "super_criteria": "Major internationally recognized award.",
+    "criteria": [
+        {"name": "Awards", "full_text": "Awards criterion.", "keywords": ["award*", "prize*"]},
+        {"name": "Scholarly Articles", "full_text": "Articles criterion.", "keywords": ["journal*", "proceedings"]},
+        {"name": "Critical Employment", "full_text": "Employment criterion.", "keywords": ["staff", "lead*"]},
+    ]
+}
+
+def test_split_sections_at_headings():
+    sections = split_sections(CV_V1)
+    assert [s["heading"] for s in sections] == ["", "summary", "experience", "publications", "education"]
+    assert sections[3]["text"] == "Doe, J. Fast Ranking. Proceedings of KDD 2021."
+
+def test_changed_lines_only_reports_edits():
+    diff = changed_lines(split_sections(CV_V1), split_sections(CV_V2))
+    assert diff == ["doe, j. faster ranking. journal of machine learning research 2024."]
+    assert changed_lines(split_sections(CV_V1), split_sections(CV_V1)) == []
+
+@pytest.mark.asyncio
+async def test_revised_cv_only_recomputes_affected_criteria(tmp_path, monkeypatch):
+    prompts = []
+
+    async def dummy_query_llm(prompt: str, **kwargs) -> dict:
+        prompts.append(prompt)
+        return {"rating": 7, "chain_of_thought": "Evidence found.", "evidence_list": ["item"]}
+
+    monkeypatch.setattr("analysis.query_llm", dummy_query_llm)
+    monkeypatch.setattr(settings, "incremental_reanalysis", True)
+    monkeypatch.setattr(settings, "revision_min_overlap", 0.5)
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+
+    first = await perform_analysis(CV_V1, VISA_INFO, history=store)
+    assert "reanalysis" not in first
+    assert len(prompts) == 4
+
+    prompts.clear()
+    second = await perform_analysis(CV_V2, VISA_INFO, history=store)
+    assert len(prompts) == 1
+    assert "Faster Ranking" in prompts[0]
+    assert second["reanalysis"]["recomputed_criteria"] == ["Scholarly Articles"]
+    assert second["criteria_results"]["Awards"] == first["criteria_results"]["Awards"]
+
+@pytest.mark.asyncio
+async def test_unrelated_cv_runs_full_analysis(tmp_path, monkeypatch):
+    async def dummy_query_llm(prompt: str, **kwargs) -> dict:
+        return {"rating": 3, "chain_of_thought": "Little evidence.", "evidence_list": []}
+
+    monkeypatch.setattr("analysis.query_llm", dummy_query_llm)
+    monkeypatch.setattr(settings, "incremental_reanalysis", True)
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    await perform_analysis(CV_V1, VISA_INFO, history=store)
+    result = await perform_analysis("Completely different resume.\nSKILLS\nPython", VISA_INFO, history=store)
+    assert "reanalysis" not in result
+
+@pytest.mark.asyncio
+async def test_brief_results_are_not_reused_for_verbose_requests(tmp_path, monkeypatch):
+    calls = []
+
+    async def dummy_query_llm(prompt: str, verbose: bool = True, **kwargs) -> dict:
+        calls.append(verbose)
+        return {"rating": 7, "chain_of_thought": "Evidence found." if verbose else "", "evidence_list": ["item"]}
+
+    monkeypatch.setattr("analysis.query_llm", dummy_query_llm)
+    monkeypatch.setattr(settings, "incremental_reanalysis", True)
+    monkeypatch.setattr(settings, "llm_streaming", True)
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+
+    await perform_analysis(CV_V1, VISA_INFO, verbose=False, history=store)
+    calls.clear()
+    result = await perform_analysis(CV_V2, VISA_INFO, verbose=True, history=store)
+    assert calls == [True] * 4
+    assert sorted(result["reanalysis"]["recomputed_criteria"]) == sorted(
+        [c["name"] for c in VISA_INFO["criteria"]] + ["super_criteria"]
+    )
+    assert all(r["chain_of_thought"] for r in result["criteria_results"].values())
+
+@pytest.mark.asyncio
+async def test_identical_cv_reuses_results_without_reporting_a_revision(tmp_path, monkeypatch):
+    calls = []
+
+    async def dummy_query_llm(prompt: str, **kwargs) -> dict:
+        calls.append(prompt)
+        return {"rating": 7, "chain_of_thought": "Evidence found.", "evidence_list": ["item"],
+                "tier": "fast", "escalation_reason": None}
+
+    monkeypatch.setattr("analysis.query_llm", dummy_query_llm)
+    monkeypatch.setattr(settings, "incremental_reanalysis", True)
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+
+    first = await perform_analysis(CV_V1, VISA_INFO, history=store)
+    calls.clear()
+    second = await perform_analysis(CV_V1, VISA_INFO, history=store)
+    assert calls == []
+    assert "reanalysis" not in second
+    assert second["criteria_results"] == first["criteria_results"]
+
+@pytest.mark.asyncio
+async def test_changed_lines_without_keywords_still_recompute(tmp_path, monkeypatch):
+    prompts = []
+
+    async def dummy_query_llm(prompt: str, **kwargs) -> dict:
+        prompts.append(prompt)
+        return {"rating": 7, "chain_of_thought": "Evidence found.", "evidence_list": ["item"]}
+
+    monkeypatch.setattr("analysis.query_llm", dummy_query_llm)
+    monkeypatch.setattr(settings, "incremental_reanalysis", True)
+    monkeypatch.setattr(settings, "revision_min_overlap", 0.5)
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    await perform_analysis(CV_V1, VISA_INFO, history=store)
+
+    # No keyword matches the new line, but the Publications heading names its criterion.
+    prompts.clear()
+    cv_v2 = CV_V1.replace("Proceedings of KDD 2021.", "Proceedings of KDD 2021.\nDoe, J. Faster Ranking. NeurIPS 2024.")
+    result = await perform_analysis(cv_v2, VISA_INFO, history=store)
+    assert result["reanalysis"]["recomputed_criteria"] == ["Scholarly Articles"]
+    assert len(prompts) == 1
+
+    # Outside a mapped section, an unmatched line could be evidence for anything.
+    prompts.clear()
+    cv_v3 = cv_v2.replace("Ph.D. Computer Science", "Ph.D. Computer Science, Stanford University")
+    result = await perform_analysis(cv_v3, VISA_INFO, history=store)
+    assert len(result["reanalysis"]["recomputed_criteria"]) == 4
+    assert len(prompts) == 4
+
+@pytest.mark.asyncio
+async def test_prescreened_results_are_not_reused_once_the_prescreen_is_off(tmp_path, monkeypatch):
+    calls = []
+
+    async def dummy_query_llm(prompt: str, **kwargs) -> dict:
+        calls.append(prompt)
+        return {"rating": 7, "chain_of_thought": "Evidence found.", "evidence_list": ["item"]}
+
+    monkeypatch.setattr("analysis.query_llm", dummy_query_llm)
+    monkeypatch.setattr(settings, "incremental_reanalysis", True)
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+
+    # CV_V1 mentions no award, so the pre-screen fills in Awards and the super-criteria.
+    monkeypatch.setattr(settings, "prescreen_enabled", True)
+    first = await perform_analysis(CV_V1, VISA_INFO, history=store)
+    assert first["criteria_results"]["Awards"].get("prescreened")
+
+    monkeypatch.setattr(settings, "prescreen_enabled", False)
+    calls.clear()
+    second = await perform_analysis(CV_V1, VISA_INFO, history=store)
+    assert len(calls) == 2
+    assert not any(r.get("prescreened") for r in second["criteria_results"].values())
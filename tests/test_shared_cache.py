@@ -0,0 +1,153 @@
+# tests/test_shared_cache.py
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import httpx
+import pytest
+from fastapi import UploadFile
+
+from shared_cache import SharedCache, get_cache
+from file_processing import process_text
+from benchmarks.stub_llm import StubChatModel
+from history_store import cv_digest
+from analysis import analysis_model_key
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_set_get_and_namespaces(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache.sqlite3"), ttl=60)
+    cache.set("extraction", "key", "cleaned text")
+    cache.set("analysis", "key", {"eligibility_rating": "low"})
+    assert cache.get("extraction", "key") == "cleaned text"
+    assert cache.get("analysis", "key") == {"eligibility_rating": "low"}
+    assert cache.get("extraction", "missing") is None
+    assert cache.metrics()["hits"] == 2 and cache.metrics()["misses"] == 1
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache.sqlite3"), ttl=-1)
+    cache.set("extraction", "key", "stale")
+    assert cache.get("extraction", "key") is None
+
+def _write_from_child(cache):
+    cache.set("analysis", "from-child", os.getpid())
+
+def test_entries_are_shared_with_forked_workers(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache.sqlite3"), ttl=60)
+    cache.set("analysis", "from-parent", os.getpid())
+    # The child inherits the parent's open connection and must reopen its own.
+    child = multiprocessing.get_context("fork").Process(target=_write_from_child, args=(cache,))
+    child.start()
+    child.join(10)
+    assert child.exitcode == 0
+    assert cache.get("analysis", "from-child") == child.pid
+
+@pytest.mark.asyncio
+async def test_process_text_reuses_cleaned_text(monkeypatch):
+    calls = []
+
+    async def counting_clean(text):
+        calls.append(text)
+        return text.strip()
+
+    monkeypatch.setattr("file_processing.clean_text_async", counting_clean)
+    for _ in range(2):
+        result = await process_text(UploadFile(filename="cv.txt", file=BytesIO(b"Won the Best Paper Award. ")))
+    assert result == "Won the Best Paper Award."
+    assert len(calls) == 1
+    assert get_cache().metrics()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_analysis_is_served_from_cache(monkeypatch):
+    import main
+
+    stub = StubChatModel(latency=0.0, jitter=0.0, seed=0)
+    calls = []
+    original = stub._completion
+    monkeypatch.setattr(stub, "_completion", lambda: calls.append(1) or original())
+    monkeypatch.setattr("analysis.llm", stub)
+    monkeypatch.setattr("analysis.get_llm", lambda model: stub)
+    monkeypatch.setattr(main, "history_store", None)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = [
+            await client.post("/analyze_cv", files={"cv": ("cv.txt", b"Published papers and won awards.")})
+            for _ in range(2)
+        ]
+    assert [r.status_code for r in responses] == [200, 200]
+    assert responses[0].json() == responses[1].json()
+    assert len(calls) == len(main.o1a_criteria["criteria"]) + 1
+
+def test_analysis_cache_key_covers_result_modes(monkeypatch):
+    import main
+    from config import settings
+
+    keys = {main.analysis_cache_key("cv", verbose) for verbose in (False, True)}
+    monkeypatch.setattr(settings, "prescreen_enabled", not settings.prescreen_enabled)
+    keys.add(main.analysis_cache_key("cv", False))
+    monkeypatch.setattr(settings, "llm_streaming", not settings.llm_streaming)
+    keys.add(main.analysis_cache_key("cv", False))
+    assert len(keys) == 4
+
+@pytest.mark.asyncio
+async def test_precomputed_fingerprint_is_used(tmp_path, monkeypatch):
+    from analysis import perform_analysis
+    from history_store import HistoryStore
+
+    async def dummy_query_llm(prompt: str, **kwargs) -> dict:
+        return {"rating": 3, "chain_of_thought": "Little evidence.", "evidence_list": []}
+
+    def fail(visa_info):
+        raise AssertionError("fingerprint recomputed")
+
+    monkeypatch.setattr("analysis.query_llm", dummy_query_llm)
+    monkeypatch.setattr("analysis.criteria_fingerprint", fail)
+    visa_info = {"criteria": [{"name": "Awards", "full_text": "Awards criterion."}]}
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    await perform_analysis("A resume.", visa_info, history=store, fingerprint="precomputed")
+    assert store.load(cv_digest("A resume."), "precomputed", analysis_model_key()) is not None
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="pre-fork serving needs os.fork")
+def test_prefork_server_drains_in_flight_requests_on_sigterm():
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_llm", "--workers", "2", "--port", str(port),
+         "--latency", "1.0", "--jitter", "0"],
+        cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        url = f"http://127.0.0.1:{port}"
+        deadline = time.time() + 60
+        while True:
+            try:
+                httpx.get(f"{url}/metrics/executors", timeout=1.0)
+                break
+            except httpx.TransportError:
+                assert time.time() < deadline, "server did not start"
+                time.sleep(0.2)
+
+        with httpx.Client(base_url=url, timeout=30.0) as client, ThreadPoolExecutor(1) as pool:
+            pending = pool.submit(
+                client.post, "/analyze_cv", files={"cv": ("cv.txt", b"Published papers and won awards.")}
+            )
+            # Stop the server while the analysis is waiting on the (1 second) stub LLM.
+            time.sleep(0.5)
+            server.send_signal(signal.SIGTERM)
+            response = pending.result(timeout=30)
+        assert response.status_code == 200
+        assert server.wait(timeout=30) == 0
+    finally:
+        if server.poll() is None:
+            server.kill()
@@ -0,0 +1,112 @@
+# tests/test_stream_parser.py
+import pytest
+from types import SimpleNamespace
+from stream_parser import IncrementalJSONParser
+from analysis import query_llm
+from config import settings
+
+COMPLETION = (
+    '```json\n{"rating": 7, "evidence_list": ["Led \\"Apollo\\", {a team}", "Best Paper"], '
+    '"confidence": 8, "chain_of_thought": "Several strong signals, including awards."}\n```'
+)
+
+def chunked(text: str, size: int = 5) -> list:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def test_fields_are_emitted_as_soon_as_complete():
+    parser = IncrementalJSONParser()
+    emitted = []
+    for chunk in chunked(COMPLETION):
+        emitted.extend(parser.feed(chunk))
+        if parser.current_key == "chain_of_thought":
+            assert parser.has_fields(("rating", "evidence_list", "confidence"))
+    assert emitted == ["rating", "evidence_list", "confidence", "chain_of_thought"]
+    assert parser.fields["evidence_list"][0] == 'Led "Apollo", {a team}'
+    assert parser.done and not parser.failed
+
+def test_malformed_value_sets_failed():
+    parser = IncrementalJSONParser()
+    parser.feed('{"rating": seven, "evidence_list": []}')
+    assert parser.failed
+    assert "rating" not in parser.fields
+
+class StubStreamingLLM:
+    """
+    Stand-in for a LangChain chat client that streams a canned completion in small chunks.
+    A max_tokens argument truncates the streamed text to that many characters, and the last
+    chunk reports finish_reason "length" when it did.
+    """
+    def __init__(self, content: str):
+        self.content = content
+        self.chunks_sent = 0
+        self.stream_kwargs = None
+        self.invocations = 0
+
+    def stream(self, messages, **kwargs):
+        self.stream_kwargs = kwargs
+        content = self.content[:kwargs["max_tokens"]] if "max_tokens" in kwargs else self.content
+        pieces = chunked(content)
+        for index, piece in enumerate(pieces):
+            self.chunks_sent += 1
+            metadata = {}
+            if index == len(pieces) - 1:
+                metadata["finish_reason"] = "length" if len(content) < len(self.content) else "stop"
+            yield SimpleNamespace(content=piece, response_metadata=metadata)
+
+    def invoke(self, messages, **kwargs):
+        self.invocations += 1
+        return SimpleNamespace(content=self.content)
+
+@pytest.fixture
+def streaming(monkeypatch):
+    monkeypatch.setattr(settings, "llm_streaming", True)
+
+    def install(content: str) -> StubStreamingLLM:
+        stub = StubStreamingLLM(content)
+        monkeypatch.setattr("analysis.llm", stub)
+        return stub
+
+    return install
+
+@pytest.mark.asyncio
+async def test_brief_query_stops_before_chain_of_thought(streaming):
+    stub = streaming(COMPLETION)
+    result = await query_llm("prompt", verbose=False)
+    assert result["rating"] == 7
+    assert result["confidence"] == 8
+    assert result["chain_of_thought"] == ""
+    assert stub.chunks_sent < len(chunked(COMPLETION))
+    assert stub.stream_kwargs == {"max_tokens": settings.stream_brief_max_tokens}
+
+@pytest.mark.asyncio
+async def test_verbose_query_reads_full_completion(streaming):
+    stub = streaming(COMPLETION)
+    result = await query_llm("prompt")
+    assert result["chain_of_thought"].startswith("Several strong signals")
+    assert stub.chunks_sent == len(chunked(COMPLETION))
+
+@pytest.mark.asyncio
+async def test_malformed_stream_falls_back_to_full_parse(streaming):
+    stub = streaming("{'rating': 7}")
+    result = await query_llm("prompt", verbose=False)
+    assert "Could not parse response" in result["error"]
+    assert result["raw_response"] == "{'rating': 7}"
+    # The answer was complete, just not JSON; a second call would not fix it.
+    assert stub.invocations == 0
+
+@pytest.mark.asyncio
+async def test_truncated_brief_stream_retries_with_full_budget(streaming, monkeypatch):
+    monkeypatch.setattr(settings, "stream_brief_max_tokens", 40)
+    stub = streaming(COMPLETION)
+    result = await query_llm("prompt", verbose=False)
+    assert result["rating"] == 7
+    assert result["evidence_list"] == ['Led "Apollo", {a team}', "Best Paper"]
+    assert stub.invocations == 1
+
+@pytest.mark.asyncio
+async def test_complete_prose_answer_is_not_retried_without_finish_reason(streaming, monkeypatch):
+    stub = streaming("I cannot rate this criterion from the CV alone.")
+    monkeypatch.setattr(stub, "stream", lambda messages, **kwargs: iter([SimpleNamespace(content=stub.content)]))
+    result = await query_llm("prompt", verbose=False)
+    assert "Could not parse response" in result["error"]
+    assert stub.invocations == 0